@@ -0,0 +1,164 @@
+"""Shared poller for Azure Document Intelligence long-running operations.
+
+Every extraction registers its Operation-Location here and awaits a future.
+A single background task polls whatever is due, backing off geometrically
+per operation and never polling sooner than Azure's Retry-After allows, so
+the number of polling loops stays at one however many analyses are running.
+"""
+
+import asyncio, json, os, time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from http_clients import http_clients
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_message(body: str) -> str:
+    """The message of an Azure error body ({"error": {"code", "message"}}), else the raw body."""
+    try:
+        error = json.loads(body).get("error") or {}
+        message = ": ".join(str(error[k]) for k in ("code", "message") if error.get(k))
+    except (ValueError, AttributeError, TypeError):
+        message = ""
+    return message or body.strip()[:500] or "no details"
+
+
+class _Operation:
+    __slots__ = ("url", "key", "future", "delay", "next_at", "deadline", "errors", "inflight")
+
+    def __init__(self, url: str, key: str, future: asyncio.Future, delay: float, deadline: float):
+        self.url = url
+        self.key = key
+        self.future = future
+        self.delay = delay
+        self.next_at = time.monotonic() + delay
+        self.deadline = deadline
+        self.errors = 0
+        self.inflight = False
+
+
+class AzurePoller:
+    def __init__(self):
+        self.initial_delay = float(os.getenv("AZURE_POLL_INITIAL", "0.5"))
+        self.max_delay = float(os.getenv("AZURE_POLL_MAX", "8"))
+        self.factor = float(os.getenv("AZURE_POLL_BACKOFF", "1.5"))
+        self.timeout = float(os.getenv("AZURE_POLL_TIMEOUT", "120"))
+        self.max_errors = 3
+        self._ops: Dict[int, _Operation] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._polls = set()
+
+    async def wait(self, operation_location: str, key: str, retry_after: Optional[float] = None) -> Dict:
+        """Wait for an analyze operation to succeed and return its JSON body."""
+        loop = asyncio.get_running_loop()
+        delay = retry_after if retry_after is not None else self.initial_delay
+        op = _Operation(operation_location, key, loop.create_future(), delay, time.monotonic() + self.timeout)
+        self._ops[id(op)] = op
+        self._ensure_running()
+        self._wake.set()
+        try:
+            return await op.future
+        finally:
+            self._ops.pop(id(op), None)
+
+    def pending(self) -> int:
+        return len(self._ops)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._polls):
+            task.cancel()
+        for op in list(self._ops.values()):
+            if not op.future.done():
+                op.future.cancel()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            for op in list(self._ops.values()):
+                if op.future.done():
+                    self._ops.pop(id(op), None)
+                elif not op.inflight and op.next_at <= now:
+                    op.inflight = True
+                    task = asyncio.create_task(self._poll(op))
+                    self._polls.add(task)
+                    task.add_done_callback(self._polls.discard)
+            waiting = [op.next_at for op in self._ops.values() if not op.inflight]
+            timeout = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, op: _Operation) -> None:
+        retry_after = None
+        try:
+            session = http_clients.session("azure")
+            async with session.get(op.url, headers={"Ocp-Apim-Subscription-Key": op.key}) as r:
+                retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                if r.status == 429 or r.status >= 500:
+                    status = None
+                elif r.status >= 400:
+                    # bad key, expired or unknown operation: retrying won't help
+                    self._finish(op, exc=HTTPException(502, f"Azure polling error {r.status}: {_error_message(await r.text())}"))
+                    return
+                else:
+                    data = await r.json()
+                    status = data.get("status")
+            op.errors = 0
+        except Exception as e:
+            op.errors += 1
+            if op.errors >= self.max_errors:
+                self._finish(op, exc=HTTPException(502, f"Azure polling error: {e}"))
+                return
+            status = None
+
+        if status == "succeeded":
+            self._finish(op, result=data)
+        elif status == "failed":
+            self._finish(op, exc=HTTPException(400, "Azure analysis failed"))
+        elif time.monotonic() >= op.deadline:
+            self._finish(op, exc=HTTPException(408, "Azure analysis timeout"))
+        else:
+            op.delay = min(max(op.delay, self.initial_delay) * self.factor, self.max_delay)
+            op.next_at = time.monotonic() + max(op.delay, retry_after or 0.0)
+            op.inflight = False
+            self._wake.set()
+
+    def _finish(self, op: _Operation, result: Optional[Dict] = None, exc: Optional[Exception] = None) -> None:
+        self._ops.pop(id(op), None)
+        if op.future.done():
+            return
+        if exc is not None:
+            op.future.set_exception(exc)
+        else:
+            op.future.set_result(result)
+
+
+azure_poller = AzurePoller()
@@ -0,0 +1,104 @@
+"""Batch extraction for multi-file and ZIP uploads.
+
+Every PDF (uploaded directly or found inside a ZIP) becomes one item. Items
+run concurrently under a semaphore, and each one reports its own result or
+error, so one bad file never fails the rest of the batch.
+"""
+
+import asyncio, zipfile
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from uploads import PDF_MAGIC, PdfUpload
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+Loader = Callable[[], Awaitable[PdfUpload]]
+# called with (digest, filename, result) for each successful item
+OnResult = Callable[[str, str, Dict], Awaitable[None]]
+
+
+def _zip_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int) -> PdfUpload:
+    if info.file_size > max_bytes:
+        raise HTTPException(413, f"PDF exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+    with zf.open(info) as f:
+        data = f.read(max_bytes + 1)  # don't trust the declared size
+    if len(data) > max_bytes:
+        raise HTTPException(413, f"PDF exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+    if PDF_MAGIC not in data[:1024]:
+        raise HTTPException(400, "File is not a valid PDF")
+    return PdfUpload.from_bytes(data)
+
+
+async def _pdf(upload: PdfUpload, max_bytes: int) -> PdfUpload:
+    if upload.size > max_bytes:
+        raise HTTPException(413, f"PDF exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+    if PDF_MAGIC not in upload.head():
+        raise HTTPException(400, "File is not a valid PDF")
+    return upload
+
+
+def _collect(files: List[Tuple[str, PdfUpload]], max_bytes: int) -> Tuple[List[Tuple[str, Loader]], List[Dict], List[zipfile.ZipFile]]:
+    items, errors, archives = [], [], []
+    for name, upload in files:
+        name = name or "upload"
+        if name.lower().endswith(".zip") or upload.head(4) == ZIP_MAGIC:
+            try:
+                # from the path ZipFile closes its own handle; in-memory uploads need no closing
+                zf = zipfile.ZipFile(upload.path or upload.open())
+            except zipfile.BadZipFile:
+                errors.append({"filename": name, "status": "error", "status_code": 400, "error": "Invalid ZIP archive"})
+                continue
+            archives.append(zf)
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".pdf") or info.filename.startswith("__MACOSX/"):
+                    continue
+                items.append((f"{name}/{info.filename}", lambda zf=zf, info=info: asyncio.to_thread(_zip_member, zf, info, max_bytes)))
+        elif name.lower().endswith(".pdf"):
+            items.append((name, lambda upload=upload: _pdf(upload, max_bytes)))
+        else:
+            errors.append({"filename": name, "status": "error", "status_code": 400, "error": "Only PDF and ZIP files are supported"})
+    return items, errors, archives
+
+
+async def _run_item(sem: asyncio.Semaphore, name: str, load: Loader, extract: Callable[[PdfUpload], Awaitable[Dict]],
+                    on_result: Optional[OnResult]) -> Dict:
+    async with sem:
+        try:
+            upload = await load()
+            try:
+                result = await extract(upload)
+            finally:
+                upload.close()
+            if on_result is not None:
+                await on_result(upload.digest, name, result)
+        except HTTPException as e:
+            return {"filename": name, "status": "error", "status_code": e.status_code, "error": str(e.detail)}
+        except Exception as e:
+            return {"filename": name, "status": "error", "status_code": 500, "error": str(e) or type(e).__name__}
+    return {"filename": name, "status": "ok", "result": result}
+
+
+async def run_batch(files: List[Tuple[str, PdfUpload]], extract: Callable[[PdfUpload], Awaitable[Dict]], concurrency: int,
+                    max_files: int, max_bytes: int, on_result: Optional[OnResult] = None) -> Dict:
+    """Extract every PDF of a batch; `files` are the spooled (filename, upload) pairs, closed here."""
+    try:
+        items, errors, archives = await asyncio.to_thread(_collect, files, max_bytes)
+    except BaseException:
+        for _, upload in files:
+            upload.close()
+        raise
+    try:
+        if len(items) + len(errors) > max_files:
+            raise HTTPException(413, f"Batch exceeds the {max_files} file limit")
+        sem = asyncio.Semaphore(max(1, concurrency))
+        results = await asyncio.gather(*[_run_item(sem, name, load, extract, on_result) for name, load in items])
+    finally:
+        for zf in archives:
+            zf.close()
+        for _, upload in files:
+            upload.close()
+    results = list(results) + errors
+    ok = sum(1 for r in results if r["status"] == "ok")
+    return {"total": len(results), "succeeded": ok, "failed": len(results) - ok, "results": results}
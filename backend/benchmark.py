@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the SOF parsing pipeline
+Usage: python benchmark.py [--output results.json] [--update-baseline]
+
+Runs each stage against the bundled SOF samples and synthetic scale-ups
+(the same document repeated N times), recording median wall time and peak
+traced memory. Exits non-zero if any stage regresses past the stored baseline.
+"""
+
+import argparse
+import io
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdf_text import page_texts
+import normalize
+from normalize import calc_duration, norm_date, norm_time
+from sof_parser import extract_events_text, extract_vessel_info_text
+
+HERE = Path(__file__).resolve().parent
+SAMPLES_DIR = HERE.parent / "SOF Samples"
+BASELINE = HERE / "benchmark_baseline.json"
+
+DATE_TOKEN = re.compile(r"\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b|\b[A-Z][a-z]{2,8}\.?\s*\d{1,2},\s*\d{4}\b")
+TIME_TOKEN = re.compile(r"\b\d{1,2}:?\d{2}\b")
+
+
+def scaled_pdf(data: bytes, factor: int) -> bytes:
+    """The sample's pages repeated `factor` times, as a new PDF."""
+    if factor == 1:
+        return data
+    reader = PdfReader(io.BytesIO(data))
+    writer = PdfWriter()
+    for _ in range(factor):
+        for page in reader.pages:
+            writer.add_page(page)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def clear_caches():
+    """Empty the normalizers' memo caches, so every run measures parsing rather than cache hits."""
+    for fn in (normalize.norm_time, normalize.minute_of_day, normalize.norm_date, normalize.norm_numeric_date,
+               normalize.day_ordinal, normalize.cell_time, normalize.cell_time_range):
+        fn.cache_clear()
+
+
+def normalize_all(dates, times):
+    for d in dates:
+        norm_date(d)
+    for t in times:
+        norm_time(t)
+    for s, e in zip(times, times[1:]):
+        calc_duration(s, e)
+
+
+def measure(fn, repeat):
+    """Median wall time (ms) over `repeat` cold-cache runs, then peak traced memory (KB) of one more."""
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    clear_caches()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "peak_kb": round(peak / 1024, 1)}
+
+
+def run(scales, repeat):
+    results = {}
+    for pdf_path in sorted(SAMPLES_DIR.glob("*.pdf")):
+        raw = pdf_path.read_bytes()
+        for factor in scales:
+            data = scaled_pdf(raw, factor)
+            pages = len(PdfReader(io.BytesIO(data)).pages)
+            text = "\n".join(page_texts(data, 0, pages))
+            dates = DATE_TOKEN.findall(text)
+            times = TIME_TOKEN.findall(text)
+            stages = {
+                # what hf_extract runs (in the worker pool) before parsing
+                "pdf_text": lambda: page_texts(data, 0, pages),
+                "vessel_info": lambda: extract_vessel_info_text(text),
+                "events": lambda: extract_events_text(text),
+                "normalize": lambda: normalize_all(dates, times),
+            }
+            name = f"{pdf_path.stem}x{factor}"
+            print(f"📄 {name}: {pages} pages, {len(text)} chars")
+            for stage, fn in stages.items():
+                key = f"{name}/{stage}"
+                results[key] = measure(fn, repeat)
+                print(f"   {stage:<12} {results[key]['median_ms']:>10.3f} ms  {results[key]['peak_kb']:>10.1f} KB")
+    return results
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Stages whose time or memory grew past the baseline by more than `tolerance`."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if cur["median_ms"] > base["median_ms"] * (1 + tolerance) + slack_ms:
+            regressions.append(f"{key}: {base['median_ms']} ms -> {cur['median_ms']} ms")
+        if cur["peak_kb"] > base["peak_kb"] * (1 + tolerance) + 64:
+            regressions.append(f"{key}: {base['peak_kb']} KB -> {cur['peak_kb']} KB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="1,10", help="comma-separated repeat factors (e.g. 1,10,50)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", default=str(BASELINE), help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed fractional slowdown (0.5 = 50%%)")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="absolute slack for very fast stages")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    results = run(scales, max(1, args.repeat))
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scales": scales,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"💾 Baseline updated: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("⚠️  No baseline found; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text())["results"], args.tolerance, args.slack_ms)
+    if regressions:
+        print("\n❌ Regressions past baseline:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
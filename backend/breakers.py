@@ -0,0 +1,202 @@
+"""Circuit breakers and health-scored routing for extraction providers.
+
+Each provider gets a breaker (closed -> open after repeated failures ->
+half-open probe after a cool-down) and a rolling window of recent call
+outcomes and latencies. The router keeps the configured preference among
+healthy providers, moves ones scoring below a threshold to the back, and
+skips providers whose breaker is open so an outage doesn't cost a full
+timeout on every request. Outcomes expire after a while, so a demoted
+provider gets its turn again. Only upstream and transport failures count
+against a provider: a call that fails on the caller's input (a corrupt
+PDF, a rejected document) says nothing about the provider's health.
+"""
+
+import asyncio, os, sys, time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+def upstream_failure(exc: BaseException) -> bool:
+    """Whether an exception is the provider's fault (transport error, timeout, 5xx/408/429)."""
+    if isinstance(exc, (ProviderUnavailable, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)  # fastapi.HTTPException
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 429)
+    aiohttp = sys.modules.get("aiohttp")  # imported lazily; if it isn't loaded, this isn't one of its errors
+    return aiohttp is not None and isinstance(exc, aiohttp.ClientError)
+
+
+def upstream_status(status: int) -> int:
+    """Status to raise for a provider's error response.
+
+    A 4xx rejection of the request is the caller's problem and stays 400;
+    auth, rate-limit, timeout and server errors become 502 and count as
+    upstream failures.
+    """
+    return 502 if status >= 500 or status in (401, 403, 408, 429) else 400
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (does not reserve it)."""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not (self.state == HALF_OPEN and self._probing)
+
+    def allow(self) -> bool:
+        """Reserve a call; in half-open state only one probe is let through."""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            # let a single probe through until it reports back
+            if self._probing:
+                return False
+            self._probing = True
+        return self.state != OPEN
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without an outcome (e.g. cancelled call)."""
+        self._probing = False
+
+
+class ProviderHealth:
+    def __init__(self, window: int = 50, slow_after: float = 20.0, ttl: float = 300.0):
+        self.slow_after = slow_after
+        self.ttl = ttl
+        self._calls = deque(maxlen=window)  # (monotonic time, ok, latency seconds)
+
+    def record(self, ok: bool, latency: float) -> None:
+        self._calls.append((time.monotonic(), ok, latency))
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+        return self._calls
+
+    @property
+    def success_rate(self) -> float:
+        calls = self._recent()
+        if not calls:
+            return 1.0
+        return sum(ok for _, ok, _ in calls) / len(calls)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        calls = self._recent()
+        if not calls:
+            return None
+        return sum(lat for _, _, lat in calls) / len(calls)
+
+    @property
+    def score(self) -> float:
+        """Success rate, discounted when calls are slower than `slow_after`."""
+        latency = self.mean_latency or 0.0
+        penalty = self.slow_after / latency if latency > self.slow_after else 1.0
+        return self.success_rate * penalty
+
+
+class ProviderRouter:
+    def __init__(self):
+        self.failure_threshold = int(os.getenv("BREAKER_FAILURES", "5"))
+        self.reset_timeout = float(os.getenv("BREAKER_RESET_S", "30"))
+        self.window = int(os.getenv("PROVIDER_HEALTH_WINDOW", "50"))
+        self.slow_after = float(os.getenv("PROVIDER_SLOW_S", "20"))
+        self.ttl = float(os.getenv("PROVIDER_HEALTH_TTL_S", "300"))
+        self.demote_below = float(os.getenv("PROVIDER_DEMOTE_BELOW", "0.8"))
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.health: Dict[str, ProviderHealth] = {}
+
+    def _get(self, name: str):
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.health[name] = ProviderHealth(self.window, self.slow_after, self.ttl)
+        return self.breakers[name], self.health[name]
+
+    def order(self, names: List[str]) -> List[str]:
+        """Providers to try, skipping open breakers.
+
+        `names` is the preferred order. Providers scoring below
+        `demote_below` go after the healthy ones, best score first.
+        """
+        pref = {name: i for i, name in enumerate(names)}
+
+        def rank(name: str):
+            score = self._get(name)[1].score
+            return (0, 0.0, pref[name]) if score >= self.demote_below else (1, -score, pref[name])
+
+        return [n for n in sorted(names, key=rank) if self._get(n)[0].available()]
+
+    def record(self, name: str, ok: bool, latency: float) -> None:
+        breaker, health = self._get(name)
+        health.record(ok, latency)
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    async def call(self, name: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run a provider call and record its outcome and latency.
+
+        Errors that aren't upstream failures (see `upstream_failure`) are
+        re-raised without touching the breaker or the health score.
+        """
+        if not self._get(name)[0].allow():
+            raise ProviderUnavailable(f"{name} circuit is open")
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            if upstream_failure(e):
+                self.record(name, False, time.monotonic() - start)
+            else:
+                self._get(name)[0].release()
+            raise
+        except BaseException:
+            self._get(name)[0].release()
+            raise
+        self.record(name, True, time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> Dict:
+        out = {}
+        for name, breaker in self.breakers.items():
+            health = self.health[name]
+            latency = health.mean_latency
+            out[name] = {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "success_rate": round(health.success_rate, 3),
+                "mean_latency_s": round(latency, 3) if latency is not None else None,
+                "score": round(health.score, 3),
+            }
+        return out
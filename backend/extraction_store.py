@@ -0,0 +1,167 @@
+"""Extraction history in SQLite with full-text search.
+
+Every extraction result (single, streamed, batch and background jobs) is
+kept, keyed by the upload's SHA-256, so the dashboard can list and search
+past SOFs without re-uploading them.
+Documents and events are plain tables; two FTS5 indexes (vessel/ports/agent
+and event description/remarks) answer the /voyages and /events/search
+queries. Re-uploading the same PDF updates its row instead of adding one.
+"""
+
+import json, re, sqlite3, threading, time
+from typing import Dict, List, Optional
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    parser_version TEXT,
+    filename TEXT,
+    vessel TEXT,
+    port_of_loading TEXT,
+    port_of_discharge TEXT,
+    agent TEXT,
+    api_used TEXT,
+    event_count INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    date TEXT, start_time TEXT, end_time TEXT, duration TEXT, description TEXT, remarks TEXT
+);
+CREATE INDEX IF NOT EXISTS events_document ON events (document_id, seq);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    vessel, ports, agent, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    description, remarks, content = 'events', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+
+def fts_query(text: str, column: Optional[str] = None) -> Optional[str]:
+    """User text -> FTS5 query: every word must match as a prefix. None if no words."""
+    words = _TOKEN.findall(text or "")
+    if not words:
+        return None
+    expr = " AND ".join(f'"{w}"*' for w in words)
+    return f"{column} : ({expr})" if column else expr
+
+
+def _field(info: Dict, key: str) -> Optional[str]:
+    value = (info or {}).get(key)
+    return None if value in (None, "", "-") else str(value)
+
+
+class ExtractionStore:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.executescript(_SCHEMA)
+
+    def save(self, digest: str, filename: Optional[str], result: Dict, parser_version: str) -> int:
+        """Store (or refresh) one extraction; returns its document id."""
+        info = result.get("vessel_info") or {}
+        events = [ev for ev in result.get("events") or [] if ev.get("Event Description", "-") != "-"]
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id, parser_version FROM documents WHERE digest = ?", (digest,)).fetchone()
+            if row and row[1] == parser_version:
+                return row[0]  # already stored by this parser
+            if row:
+                self._delete(row[0])
+            cur = self._conn.execute(
+                "INSERT INTO documents (digest, parser_version, filename, vessel, port_of_loading, port_of_discharge,"
+                " agent, api_used, event_count, result, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, parser_version, filename, _field(info, "Vessel Name"), _field(info, "Port of Loading"),
+                 _field(info, "Port of Discharge"), _field(info, "Agent"), result.get("api_used"), len(events),
+                 json.dumps(result, default=dict), time.time()),
+            )
+            doc_id = cur.lastrowid
+            ports = " ".join(p for p in (_field(info, "Port of Loading"), _field(info, "Port of Discharge")) if p)
+            self._conn.execute(
+                "INSERT INTO documents_fts (rowid, vessel, ports, agent) VALUES (?, ?, ?, ?)",
+                (doc_id, _field(info, "Vessel Name") or "", ports, _field(info, "Agent") or ""),
+            )
+            rows = [
+                (doc_id, seq, ev.get("Date"), ev.get("Start Time"), ev.get("End Time"), ev.get("Duration"),
+                 ev.get("Event Description"), ev.get("Remarks"))
+                for seq, ev in enumerate(events)
+            ]
+            self._conn.executemany(
+                "INSERT INTO events (document_id, seq, date, start_time, end_time, duration, description, remarks)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            self._conn.execute(
+                "INSERT INTO events_fts (rowid, description, remarks) SELECT id, description, remarks FROM events"
+                " WHERE document_id = ?", (doc_id,),
+            )
+        return doc_id
+
+    def _delete(self, doc_id: int) -> None:
+        # external-content FTS rows must be removed with the values they were indexed with
+        self._conn.execute(
+            "INSERT INTO events_fts (events_fts, rowid, description, remarks)"
+            " SELECT 'delete', id, description, remarks FROM events WHERE document_id = ?", (doc_id,),
+        )
+        self._conn.execute("DELETE FROM events WHERE document_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def voyages(self, vessel: Optional[str] = None, port: Optional[str] = None, agent: Optional[str] = None,
+                limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Stored documents, newest first, filtered by vessel/port/agent words."""
+        terms = [q for q in (fts_query(vessel, "vessel"), fts_query(port, "ports"), fts_query(agent, "agent")) if q]
+        sql = ("SELECT d.id, d.digest, d.filename, d.vessel, d.port_of_loading, d.port_of_discharge, d.agent,"
+               " d.api_used, d.event_count, d.created_at FROM documents d")
+        params: list = []
+        if terms:
+            sql += " WHERE d.id IN (SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?)"
+            params.append(" AND ".join(terms))
+        sql += " ORDER BY d.id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("id", "digest", "filename", "vessel", "port_of_loading", "port_of_discharge", "agent",
+                "api_used", "event_count", "created_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def voyage(self, doc_id: int) -> Optional[Dict]:
+        """The full stored extraction result of one document."""
+        with self._lock:
+            row = self._conn.execute("SELECT filename, result, created_at FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        if not row:
+            return None
+        return {"id": doc_id, "filename": row[0], "created_at": row[2], **json.loads(row[1])}
+
+    def search_events(self, q: str, vessel: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Events whose description or remarks match every word of `q`, newest first."""
+        query = fts_query(q)
+        if query is None:
+            return []
+        sql = ("SELECT e.document_id, d.vessel, d.filename, e.date, e.start_time, e.end_time, e.duration,"
+               " e.description, e.remarks FROM events_fts f JOIN events e ON e.id = f.rowid"
+               " JOIN documents d ON d.id = e.document_id WHERE events_fts MATCH ?")
+        params: list = [query]
+        vessel_q = fts_query(vessel, "vessel")
+        if vessel_q:
+            sql += " AND e.document_id IN (SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?)"
+            params.append(vessel_q)
+        sql += " ORDER BY f.rowid DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"voyage_id": r[0], "vessel": r[1], "filename": r[2], "Date": r[3], "Start Time": r[4], "End Time": r[5],
+             "Duration": r[6], "Event Description": r[7], "Remarks": r[8]}
+            for r in rows
+        ]
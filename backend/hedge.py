@@ -0,0 +1,70 @@
+"""Hedged provider execution.
+
+Instead of trying providers one after another, every candidate starts at
+once (typically the remote provider plus the cheap local text parse). The
+most preferred result that passes a quality check wins; a less preferred
+one is only used if nothing better has arrived by the latency budget.
+Remaining tasks are cancelled as soon as a winner is chosen.
+"""
+
+import asyncio, time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+Candidate = Tuple[str, Callable[[], Awaitable[Optional[Dict]]]]
+
+
+def result_ok(result: Optional[Dict]) -> bool:
+    """Quality bar: a vessel name and at least one dated event."""
+    if not result:
+        return False
+    name = (result.get("vessel_info") or {}).get("Vessel Name", "-")
+    dated = any(ev.get("Date", "-") not in ("-", "") for ev in result.get("events") or [])
+    return name not in ("-", "") and dated
+
+
+async def hedged(candidates: List[Candidate], budget: float, accept: Callable[[Optional[Dict]], bool] = result_ok) -> Dict:
+    """Run candidates (in preference order) concurrently and return the best result."""
+    if not candidates:
+        raise HTTPException(500, "No extraction providers configured")
+    tasks = [asyncio.create_task(run()) for _, run in candidates]
+    rank = {task: i for i, task in enumerate(tasks)}
+    results: Dict[int, Dict] = {}
+    errors: List[str] = []
+    deadline = time.monotonic() + budget
+    pending = set(tasks)
+    good: List[int] = []
+    try:
+        while pending:
+            timeout = deadline - time.monotonic()
+            # Past the budget, settle for any passing result; otherwise keep
+            # waiting until one passes or every candidate has finished
+            if timeout <= 0 and good:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout if timeout > 0 else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                i = rank[task]
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors.append(f"{candidates[i][0]}: {getattr(e, 'detail', e)}")
+                    continue
+                if result is not None:
+                    results[i] = result
+            good = sorted(i for i, r in results.items() if accept(r))
+            # Winner: a passing result that no still-running candidate outranks
+            if good and all(rank[t] > good[0] for t in pending):
+                return results[good[0]]
+        good = sorted(i for i, r in results.items() if accept(r))
+        if good:
+            return results[good[0]]
+        if results:
+            return results[min(results)]
+        raise HTTPException(500, "All extraction methods failed: " + "; ".join(errors))
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
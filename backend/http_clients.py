@@ -0,0 +1,81 @@
+"""Process-wide pooled HTTP clients for the extraction providers.
+
+Each provider gets one long-lived aiohttp session with its own connection
+limit, so TLS handshakes and DNS lookups are paid once and later requests
+reuse warm keep-alive connections. Sessions are created lazily inside the
+running event loop and closed by the FastAPI app lifespan. aiohttp itself
+is imported with the first session, keeping it off the cold-start path.
+"""
+
+import os
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Max concurrent connections per provider (override with HTTP_LIMIT_<PROVIDER>)
+PROVIDER_LIMITS = {
+    "azure": 20,
+    "huggingface": 8,
+    "openai": 8,
+}
+DEFAULT_LIMIT = 10
+
+# Total seconds per request (override with HTTP_TIMEOUT_<PROVIDER>); LLM completions
+# of a few thousand tokens regularly run past a minute
+PROVIDER_TIMEOUTS = {
+    "azure": 60,
+    "huggingface": 60,
+    "openai": 300,
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class HTTPClients:
+    def __init__(self):
+        self.dns_ttl = int(_env_float("HTTP_DNS_TTL", 300))
+        self.keepalive = _env_float("HTTP_KEEPALIVE", 60)
+        self.default_timeout = _env_float("HTTP_TIMEOUT", 60)  # providers not in PROVIDER_TIMEOUTS
+        self.connect_timeout = _env_float("HTTP_CONNECT_TIMEOUT", 10)
+        self._sessions: Dict[str, "aiohttp.ClientSession"] = {}
+
+    def limit(self, provider: str) -> int:
+        default = PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT)
+        return int(_env_float(f"HTTP_LIMIT_{provider.upper()}", default))
+
+    def timeout(self, provider: str) -> float:
+        default = PROVIDER_TIMEOUTS.get(provider, self.default_timeout)
+        return _env_float(f"HTTP_TIMEOUT_{provider.upper()}", default)
+
+    def session(self, provider: str) -> "aiohttp.ClientSession":
+        """Return the shared session for a provider, creating it on first use."""
+        session = self._sessions.get(provider)
+        if session is None or session.closed:
+            session = self._sessions[provider] = self._create(provider)
+        return session
+
+    def _create(self, provider: str) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit(provider),
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout(provider), connect=self.connect_timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+
+http_clients = HTTPClients()
@@ -0,0 +1,175 @@
+"""Background extraction jobs backed by SQLite.
+
+POST /jobs stores the upload and returns immediately; a fixed pool of async
+workers drains the queue through the normal extraction pipeline. Job rows
+(including the PDF until it is processed) live in SQLite, so queued or
+interrupted jobs are picked up again after a restart. A worker survives
+any error around a job (a locked database, a failing result hook): it logs
+it, marks the job failed if it can, and moves on to the next one.
+"""
+
+import asyncio, json, logging, sqlite3, threading, time, uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from uploads import CHUNK_SIZE, PdfUpload
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+logger = logging.getLogger("sof")
+
+
+class JobStore:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    filename TEXT,
+                    pdf BLOB,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+
+    def create(self, filename: str, upload: PdfUpload) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn, upload.open() as f:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, pdf, created_at, updated_at) VALUES (?, ?, ?, zeroblob(?), ?, ?)",
+                (job_id, QUEUED, filename, upload.size, now, now),
+            )
+            # copied in chunks from the spooled upload, never held in memory whole
+            with self._conn.blobopen("jobs", "pdf", cur.lastrowid) as blob:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    blob.write(chunk)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, filename, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        job = {"job_id": row[0], "status": row[1], "filename": row[2], "created_at": row[5], "updated_at": row[6]}
+        if row[3] is not None:
+            job["result"] = json.loads(row[3])
+        if row[4] is not None:
+            job["error"] = row[4]
+        return job
+
+    def load_pdf(self, job_id: str, spool_bytes: int = CHUNK_SIZE) -> Optional[Tuple[str, PdfUpload]]:
+        """(filename, spooled PDF) of a job that hasn't finished, else None."""
+        with self._lock:
+            row = self._conn.execute("SELECT rowid, filename, length(pdf) FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row or row[2] is None:
+                return None
+            with self._conn.blobopen("jobs", "pdf", row[0], readonly=True) as blob:
+                upload = PdfUpload.from_chunks(iter(lambda: blob.read(CHUNK_SIZE), b""), row[2], spool_bytes)
+        return row[1], upload
+
+    def mark(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        done = status in (SUCCEEDED, FAILED)
+        with self._lock, self._conn:
+            self._conn.execute(
+                # The PDF is only needed until the job finishes
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?"
+                + (", pdf = NULL" if done else "") + " WHERE id = ?",
+                (status, json.dumps(result, default=dict) if result is not None else None, error, time.time(), job_id),
+            )
+
+    def unfinished(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    def __init__(self, store: JobStore, runner: Callable[[PdfUpload], Awaitable[Dict]], workers: int = 2, max_queued: int = 100,
+                 on_result: Optional[Callable[[str, str, Dict], Awaitable[None]]] = None, spool_bytes: int = CHUNK_SIZE):
+        self.store = store
+        self.runner = runner
+        self.spool_bytes = spool_bytes
+        self.on_result = on_result  # called with (digest, filename, result) when a job succeeds
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        # Re-queue anything left over from a previous process
+        for job_id in await asyncio.to_thread(self.store.unfinished):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, filename: str, upload: PdfUpload) -> str:
+        if self._queue.qsize() >= self.max_queued:
+            raise HTTPException(503, "Job queue is full, try again later")
+        job_id = await asyncio.to_thread(self.store.create, filename, upload)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.exception("Job %s failed outside extraction", job_id)
+                await self._fail(job_id, f"Internal error: {e or type(e).__name__}")
+            finally:
+                self._queue.task_done()
+
+    async def _fail(self, job_id: str, error: str) -> None:
+        try:
+            await asyncio.to_thread(self.store.mark, job_id, FAILED, None, error)
+        except Exception as e:
+            # left queued/running in the store, so it is retried after a restart
+            logger.warning("Could not mark job %s failed: %s", job_id, e)
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.load_pdf, job_id, self.spool_bytes)
+        if job is None:
+            return
+        filename, upload = job
+        try:
+            await asyncio.to_thread(self.store.mark, job_id, RUNNING)
+            try:
+                result = await self.runner(upload)
+            except HTTPException as e:
+                await asyncio.to_thread(self.store.mark, job_id, FAILED, None, str(e.detail))
+            except Exception as e:
+                await asyncio.to_thread(self.store.mark, job_id, FAILED, None, str(e) or type(e).__name__)
+            else:
+                await asyncio.to_thread(self.store.mark, job_id, SUCCEEDED, result)
+                if self.on_result is not None:
+                    try:
+                        await self.on_result(upload.digest, filename, result)
+                    except Exception:
+                        # the job itself succeeded; only the hook failed
+                        logger.exception("Result hook failed for job %s", job_id)
+        finally:
+            upload.close()
@@ -0,0 +1,141 @@
+"""Laytime and demurrage/dispatch from extracted SOF event timelines.
+
+Each voyage's events become [start, end) intervals in absolute minutes.
+Time used runs from commencement (the earliest start) to completion (the
+latest end), gaps between events included. Time excepted is the union of
+intervals whose remarks (or description keywords) mark them as not
+counting, e.g. the "Weather delay" and "Equipment failure" remarks the
+parser assigns. Time counted is the difference, compared against the
+allowed laytime. A voyage with no timed events has nothing to compare, so
+it gets no balance, result or amount.
+
+The interval math runs on numpy arrays for a whole batch at once. Every
+voyage is shifted into its own disjoint range of the time axis, so one sort
+and one running maximum merge the overlapping intervals of all voyages.
+numpy is imported on the first calculation, not when the app starts.
+"""
+
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from normalize import MISSING, day_ordinal, minute_of_day
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_EXCEPTED_REMARKS = ("Weather delay", "Equipment failure")
+DEFAULT_EXCEPTED_KEYWORDS = ("rain", "breakdown")
+MINUTES_PER_DAY = 1440
+
+
+class Voyage(BaseModel):
+    id: Optional[str] = None
+    events: List[Dict[str, str]] = Field(default_factory=list, description="Events as returned by /extract")
+    allowed_hours: Optional[float] = Field(None, ge=0, description="Laytime allowed; or give quantity and rate")
+    quantity: Optional[float] = Field(None, ge=0, description="Cargo quantity (MT)")
+    rate: Optional[float] = Field(None, gt=0, description="Load/discharge rate (MT per day)")
+    demurrage_rate: float = Field(0.0, ge=0, description="Demurrage per day")
+    dispatch_rate: Optional[float] = Field(None, ge=0, description="Dispatch per day (default: half demurrage)")
+    excepted_remarks: Optional[List[str]] = None
+
+
+class LaytimeBatch(BaseModel):
+    voyages: List[Voyage]
+
+
+def _intervals(events: Sequence[Dict[str, str]], excepted_remarks, keywords):
+    """(start, end, excepted) minute triples for events with a date, start and end time."""
+    out = []
+    for ev in events:
+        day = day_ordinal(ev.get("Date", "-"))
+        start = minute_of_day(ev.get("Start Time", "-"))
+        end = minute_of_day(ev.get("End Time", "-"))
+        if MISSING in (day, start, end):
+            continue
+        begin = day * MINUTES_PER_DAY + start
+        finish = day * MINUTES_PER_DAY + end
+        if finish < begin:  # ran past midnight
+            finish += MINUTES_PER_DAY
+        desc = ev.get("Event Description", "").lower()
+        excepted = ev.get("Remarks", "-") in excepted_remarks or any(k in desc for k in keywords)
+        out.append((begin, finish, excepted))
+    return out
+
+
+def _union_minutes(voyage: "np.ndarray", start: "np.ndarray", end: "np.ndarray", n_voyages: int) -> "np.ndarray":
+    """Length of the union of intervals, per voyage."""
+    import numpy as np
+
+    if start.size == 0:
+        return np.zeros(n_voyages)
+    # move each voyage into its own slot of the axis so merging never crosses voyages
+    origin = np.full(n_voyages, np.iinfo(np.int64).max)
+    np.minimum.at(origin, voyage, start)
+    span = int((end - origin[voyage]).max()) + 1
+    s = voyage * span + (start - origin[voyage])
+    e = voyage * span + (end - origin[voyage])
+    order = np.argsort(s, kind="stable")
+    s, e, v = s[order], e[order], voyage[order]
+    reach = np.maximum.accumulate(e)
+    prev = np.concatenate(([s[0]], reach[:-1]))
+    covered = np.clip(e - np.maximum(s, prev), 0, None)
+    return np.bincount(v, weights=covered, minlength=n_voyages)
+
+
+def compute_batch(voyages: Sequence[Voyage]) -> List[Dict]:
+    """Laytime statement per voyage; voyages without allowed laytime or timed events get no demurrage/dispatch."""
+    import numpy as np
+
+    rows, first, last = [], [], []
+    for i, voyage in enumerate(voyages):
+        remarks = set(voyage.excepted_remarks if voyage.excepted_remarks is not None else DEFAULT_EXCEPTED_REMARKS)
+        intervals = _intervals(voyage.events, remarks, DEFAULT_EXCEPTED_KEYWORDS)
+        rows.extend((i, b, f, x) for b, f, x in intervals)
+        first.append(min((b for b, _, _ in intervals), default=None))
+        last.append(max((f for _, f, _ in intervals), default=None))
+
+    n = len(voyages)
+    arr = np.array(rows, dtype=np.int64).reshape(-1, 4)
+    idx, start, end, excepted = arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3].astype(bool)
+    # commencement to completion; minute counts stay exact in float64
+    span = np.array([np.nan if f is None else l - f for f, l in zip(first, last)], dtype=float)
+    timed = ~np.isnan(span)
+    used = np.nan_to_num(span) / 60
+    excepted_h = _union_minutes(idx[excepted], start[excepted], end[excepted], n) / 60
+    counted = used - excepted_h
+
+    allowed = np.array([
+        v.allowed_hours if v.allowed_hours is not None
+        else (v.quantity / v.rate * 24 if v.quantity is not None and v.rate else np.nan)
+        for v in voyages
+    ], dtype=float)
+    demurrage_rate = np.array([v.demurrage_rate for v in voyages], dtype=float)
+    dispatch_rate = np.array([v.dispatch_rate if v.dispatch_rate is not None else v.demurrage_rate / 2 for v in voyages], dtype=float)
+    balance = counted - allowed  # hours; > 0 is demurrage
+    amount = np.where(balance > 0, balance / 24 * demurrage_rate, -balance / 24 * dispatch_rate)
+
+    results = []
+    for i, voyage in enumerate(voyages):
+        known = timed[i] and not np.isnan(allowed[i])
+        results.append({
+            "id": voyage.id,
+            "commenced": _iso(first[i]),
+            "completed": _iso(last[i]),
+            "time_used_hours": round(float(used[i]), 2),
+            "time_excepted_hours": round(float(excepted_h[i]), 2),
+            "time_counted_hours": round(float(counted[i]), 2),
+            "laytime_allowed_hours": None if np.isnan(allowed[i]) else round(float(allowed[i]), 2),
+            "balance_hours": round(float(balance[i]), 2) if known else None,
+            "result": ("demurrage" if balance[i] > 0 else "dispatch" if balance[i] < 0 else "even") if known else None,
+            "amount": round(float(amount[i]), 2) if known else None,
+        })
+    return results
+
+
+def _iso(minutes: Optional[int]) -> Optional[str]:
+    if minutes is None:
+        return None
+    day, minute = divmod(minutes, MINUTES_PER_DAY)
+    return (datetime.fromordinal(day) + timedelta(minutes=minute)).isoformat(timespec="minutes")
@@ -0,0 +1,139 @@
+"""Split SOF text into LLM-sized chunks and merge the per-chunk answers.
+
+Page text is first normalized (Unicode compatibility forms, whitespace,
+blank lines and "Page x of y" footers), so the same page always yields the
+same chunk text and the LLM response cache can recognise it. Pages are
+then packed into chunks of at most `budget` tokens (estimated at four
+characters per token), breaking oversized pages on line boundaries. Each
+chunk repeats the last few lines of the previous one so an event that
+straddles a boundary is seen whole by at least one chunk. The per-chunk
+`events` arrays are then normalized, given the date in effect where the
+chunk left off, deduplicated (the overlap reports some events twice) and
+sorted into one timeline.
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List
+
+from normalize import calc_duration, norm_date, norm_time
+from sof_events import Event
+from sof_parser import sort_events
+
+CHARS_PER_TOKEN = 4
+VESSEL_FIELDS = ("Vessel Name", "Master", "Agent", "Port of Loading", "Port of Discharge", "Cargo", "Quantity (MT)")
+
+_SPACES = re.compile(r"\s+")
+_PAGE_FOOTER = re.compile(r"(?i)^(?:page\s*\d+(?:\s*(?:/|of)\s*\d+)?|\d+\s+of\s+\d+)$")
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ].*)?$")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def normalize_page(text: str) -> str:
+    """Page text with layout noise removed; one cleaned line per non-empty line."""
+    lines = (_SPACES.sub(" ", line).strip() for line in unicodedata.normalize("NFKC", text).splitlines())
+    return "".join(line + "\n" for line in lines if line and not _PAGE_FOOTER.match(line))
+
+
+def _pieces(pages: Iterable[str], budget: int) -> List[str]:
+    """Page texts, with pages over the budget split into runs of whole lines."""
+    pieces = []
+    for page in pages:
+        if estimate_tokens(page) <= budget:
+            pieces.append(page)
+            continue
+        run, size = [], 0
+        for line in page.splitlines(keepends=True):
+            cost = estimate_tokens(line)
+            if run and size + cost > budget:
+                pieces.append("".join(run))
+                run, size = [], 0
+            # a single line over budget is hard-wrapped
+            while cost > budget:
+                cut = budget * CHARS_PER_TOKEN
+                pieces.append(line[:cut])
+                line, cost = line[cut:], estimate_tokens(line[cut:])
+            run.append(line)
+            size += cost
+        if run:
+            pieces.append("".join(run))
+    return pieces
+
+
+def _tail(text: str, lines: int, max_tokens: int) -> str:
+    """The last `lines` lines of `text`, fewer if they exceed `max_tokens`."""
+    tail = text.splitlines(keepends=True)[-lines:] if lines else []
+    while tail and estimate_tokens("".join(tail)) > max_tokens:
+        tail.pop(0)
+    return "".join(tail)
+
+
+def chunk_pages(pages: Iterable[str], budget: int, overlap_lines: int = 3) -> List[str]:
+    """Pack page texts into chunks of at most `budget` tokens, overlapping by a few lines."""
+    # up to a quarter of each chunk may be repeated from the previous one
+    overlap_budget = budget // 4 if overlap_lines else 0
+    chunks, current, size, fresh = [], [], 0, False
+    for piece in _pieces(map(normalize_page, pages), budget - overlap_budget):
+        if not piece.endswith("\n"):
+            piece += "\n"
+        cost = estimate_tokens(piece)
+        if fresh and size + cost > budget:
+            text = "".join(current)
+            chunks.append(text)
+            tail = _tail(text, overlap_lines, overlap_budget)
+            current, size, fresh = [tail], estimate_tokens(tail), False
+        current.append(piece)
+        size += cost
+        fresh = fresh or bool(piece.strip())
+    if fresh:
+        chunks.append("".join(current))
+    return chunks
+
+
+def _text(value) -> str:
+    value = "" if value is None else _SPACES.sub(" ", str(value)).strip()
+    return value or "-"
+
+
+def _date(value: str) -> str:
+    """An LLM date as "DD Mon YYYY"; models often answer in ISO form rather than as written."""
+    m = _ISO_DATE.match(value)
+    return norm_date(f"{m.group(3)}.{m.group(2)}.{m.group(1)}" if m else value)
+
+
+def merge_vessel_info(infos: Iterable[Dict]) -> Dict[str, str]:
+    """First non-empty value of each field, in chunk order."""
+    merged = {field: "-" for field in VESSEL_FIELDS}
+    for info in infos:
+        for field in VESSEL_FIELDS:
+            if merged[field] == "-" and isinstance(info, dict):
+                merged[field] = _text(info.get(field))
+    return merged
+
+
+def merge_events(chunk_events: Iterable[List[Dict]]) -> List[Event]:
+    """One sorted, deduplicated timeline from per-chunk event arrays (in chunk order)."""
+    events, seen = [], set()
+    current_date = "-"
+    for batch in chunk_events:
+        for raw in batch or []:
+            if not isinstance(raw, dict):
+                continue
+            desc = _text(raw.get("Event Description"))
+            start, end = norm_time(_text(raw.get("Start Time"))), norm_time(_text(raw.get("End Time")))
+            if desc == "-" and start == "-":
+                continue
+            date = _text(raw.get("Date"))
+            # rows without a date continue the last date seen, also across chunks
+            current_date = _date(date) if date != "-" else current_date
+            key = (current_date, start, end, desc.lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            duration = calc_duration(start, end)
+            events.append(Event(current_date, start, end, duration if duration != "-" else _text(raw.get("Duration")),
+                                desc, _text(raw.get("Remarks"))))
+    return sort_events(events)
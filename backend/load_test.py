@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Concurrent load driver for the SOF Document Extractor API
+Usage: python load_test.py [--url http://localhost:8000] [--concurrency 1,4,16] [--requests 50] [pdf ...]
+
+Uploads the given PDFs (the bundled SOF samples by default) at each
+concurrency level and reports throughput and p50/p95/p99 latency. Every
+upload gets a unique trailing comment so the result cache doesn't answer
+it; pass --allow-cache to measure cached responses instead.
+
+For an offline run against the local Azure stand-in:
+
+    python mock_azure.py --latency 2 &
+    AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT=http://127.0.0.1:8765 \\
+    AZURE_DOCUMENT_INTELLIGENCE_KEY=mock uvicorn main:app &
+    python load_test.py --concurrency 1,8,32
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / "SOF Samples"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+async def one_request(session, url, name, body, results):
+    form = aiohttp.FormData()
+    form.add_field("pdf", body, filename=name, content_type="application/pdf")
+    start = time.perf_counter()
+    try:
+        async with session.post(url, data=form) as response:
+            await response.read()
+            status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        status = type(e).__name__
+    results.append((status, time.perf_counter() - start))
+
+
+async def run_level(session, url, docs, concurrency, total, unique, counter):
+    results = []
+    queue = asyncio.Queue()
+    for _, (name, data) in zip(range(total), itertools.cycle(docs)):
+        # PDF readers ignore anything after %%EOF, but the content hash changes
+        body = data + f"\n% load-test {next(counter)}\n".encode() if unique else data
+        queue.put_nowait((name, body))
+
+    async def worker():
+        while not queue.empty():
+            name, body = queue.get_nowait()
+            await one_request(session, url, name, body, results)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for status, lat in results if status == 200)
+    statuses = Counter(str(status) for status, _ in results)
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(latencies),
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+async def main_async(args):
+    paths = [Path(p) for p in args.pdfs] or sorted(SAMPLES_DIR.glob("*.pdf"))
+    docs = [(p.name, p.read_bytes()) for p in paths]
+    if not docs:
+        print("❌ No PDFs to upload")
+        return 1
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    url = f"{args.url.rstrip('/')}{args.endpoint}"
+
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=max(levels))
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        try:
+            async with session.get(f"{args.url.rstrip('/')}/health") as r:
+                health = await r.json()
+            print(f"✅ API is healthy, available APIs: {', '.join(health.get('available_apis', []))}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"❌ Health check failed: {e}")
+            return 1
+
+        print(f"📡 {url} with {len(docs)} document(s), {args.requests} requests per level\n")
+        print(f"{'conc':>5} {'ok':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+        counter = itertools.count()
+        report = []
+        for level in levels:
+            row = await run_level(session, url, docs, level, args.requests, not args.allow_cache, counter)
+            report.append(row)
+            print(f"{row['concurrency']:>5} {row['ok']:>6} {row['throughput_rps']:>8} {str(row['p50_ms']):>9} "
+                  f"{str(row['p95_ms']):>9} {str(row['p99_ms']):>9}  {row['statuses']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"url": url, "levels": report}, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the SOF extraction API")
+    parser.add_argument("pdfs", nargs="*", help="PDFs to upload (default: SOF Samples/*.pdf)")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", default="/extract")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--allow-cache", action="store_true", help="re-send identical bytes (cache hits)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
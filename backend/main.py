@@ -1,15 +1,52 @@
-from fastapi import FastAPI, UploadFile, HTTPException
+from warmup import startup  # first, so the startup report covers the imports below
+from fastapi import FastAPI, HTTPException, Request, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.routing import Match
 from dotenv import load_dotenv
-import os, re, io, json, asyncio, aiohttp
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from PyPDF2 import PdfReader
+from contextlib import asynccontextmanager, nullcontext
+import os, json, asyncio, logging, time, hmac, sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+from result_cache import ResultCache
+from http_clients import http_clients
+from azure_poller import azure_poller, parse_retry_after
+from jobs import JobQueue, JobStore
+from extraction_store import ExtractionStore
+from pdf_text import PdfTextExtractor
+from uploads import FORM_OVERHEAD, PdfUpload, form_schema, receive_files, receive_pdf
+from batch import run_batch
+from hedge import hedged
+from breakers import ProviderRouter, upstream_status
+import metrics
+from metrics import stage
+from profiler import SamplingProfiler
+# Local text parsers (fallbacks and Azure content post-process)
+from sof_parser import extract_vessel_info_text, extract_events_text, EventParser
+from sof_tables import extract_events_tables
+from sof_events import FastJSONResponse, dumps
+from laytime import LaytimeBatch, compute_batch
+startup.mark("imports")
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="SOF Document Extractor", version="2.0.0")
+logger = logging.getLogger("sof")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_queue.start()
+    startup.mark("startup")
+    # Serve right away; lazy imports, parsers, workers and connections warm up behind it
+    startup.start(WARM_STEPS, WARMUP_DELAY_S, WARMUP_MAX_WAIT_S)
+    yield
+    await startup.stop()
+    await job_queue.stop()
+    await azure_poller.close()
+    await http_clients.close()
+    pdf_extractor.shutdown()
+
+app = FastAPI(title="SOF Document Extractor", version="2.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +56,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_label(request: Request) -> str:
+    # Route template (e.g. /jobs/{job_id}) so metric labels stay bounded
+    for route in app.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            return route.path
+    return "unmatched"
+
+# Probes and scrapes don't hold back warm-up (it waits for the app to be idle)
+UNTRACKED_ROUTES = {"/health", "/ready", "/metrics"}
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    labels = {"method": request.method, "route": route_label(request)}
+    start = time.perf_counter()
+    status = 500
+    try:
+        busy = nullcontext() if labels["route"] in UNTRACKED_ROUTES else startup.request()
+        with busy, metrics.HTTP_INFLIGHT.track(**labels):
+            response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - start, status=str(status), **labels)
+
 # ---- Config ----
 AZURE_ENDPOINT = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
 AZURE_KEY = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
@@ -28,164 +89,255 @@ HF_TOKEN = os.getenv("HF_API_TOKEN")
 if not HF_TOKEN:
     print("[WARN] HF_API_TOKEN is not set. Hugging Face features may be disabled.")
 
-# ---- Helpers ----
-def norm_time(t: str) -> str:
-    t = t.strip()
-    if re.fullmatch(r"\d{3,4}", t):
-        t = t.zfill(4)
-        return f"{t[:2]}:{t[2:]}"
-    m = re.match(r"^(\d{1,2}):(\d{2})$", t)
-    return t.zfill(5) if m else t
+# Bump whenever parsing output changes so cached results are not reused
+PARSER_VERSION = "2.2.1"
+# Extraction result cache (disk tier is off unless SOF_CACHE_DIR is set)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("SOF_CACHE_ENTRIES", "256")),
+    disk_dir=os.getenv("SOF_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("SOF_CACHE_DISK_MB", "256")) * 1024 * 1024,
+)
 
-def calc_duration(s: str, e: str) -> str:
-    try:
-        sdt = datetime.strptime(s, "%H:%M")
-        edt = datetime.strptime(e, "%H:%M")
-        if edt < sdt:
-            edt += timedelta(days=1)
-        h = (edt - sdt).seconds / 3600
-        return f"{h:.1f}h" if h % 1 else f"{int(h)}h"
-    except:
-        return "-"
-
-def norm_date(d: str) -> str:
-    d = d.strip()
-    m1 = re.search(r'ON\s+([A-Z]+)\s+(\d{1,2}),\s*(\d{4})', d, re.IGNORECASE)
-    if m1:
-        month_map = {'JANUARY':'Jan','FEBRUARY':'Feb','MARCH':'Mar','APRIL':'Apr','MAY':'May','JUNE':'Jun','JULY':'Jul','AUGUST':'Aug','SEPTEMBER':'Sep','OCTOBER':'Oct','NOVEMBER':'Nov','DECEMBER':'Dec'}
-        mon, day, year = m1.groups()
-        mon = month_map.get(mon.upper(), mon[:3])
-        return f"{day.zfill(2)} {mon} {year}"
-    m2 = re.search(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', d)
-    if m2:
-        day, mon, year = m2.groups()
-        names = ['', 'Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec']
-        try:
-            return f"{day.zfill(2)} {names[int(mon)]} {year}"
-        except:
-            return d
-    m3 = re.search(r'([A-Z][a-z]{2,8})\.?\s*(\d{1,2}),\s*(\d{4})', d)
-    if m3:
-        mon, day, year = m3.groups()
-        return f"{day.zfill(2)} {mon[:3]} {year}"
-    return d
-
-# ---- Local text parsers (fallbacks and Azure content post-process) ----
-VESSEL_PATTERNS = {
-    "Vessel Name": [r"(?i)(?:Name of Vessel|Vessel|M\.V\.|Ship)\s*[:\-]?\s*([^\n\r]+)"],
-    "Master": [r"(?i)(?:Name of Master|Master|Captain)\s*[:\-]?\s*([^\n\r]+)"],
-    "Agent": [r"(?i)(?:Name of Agent|Agent)\s*[:\-]?\s*([^\n\r]+)"],
-    "Port of Loading": [r"(?i)(?:Port of Loading|Loading Port|From)\s*[:\-]?\s*([^\n\r,]+)"],
-    "Port of Discharge": [r"(?i)(?:Port of Discharging|Port of Discharge|Discharge Port|To)\s*[:\-]?\s*([^\n\r,]+)"],
-    "Cargo": [r"(?i)(?:Cargo Description|Description of Cargo|Cargo|Commodity)\s*[:\-]?\s*([^\n\r]+?)\s*(?:Quantity|$)"],
-    "Quantity (MT)": [r"(?i)(?:Quantity|Cargo Quantity)\s*[:\-]?\s*([\d,\.]+)", r"([\d,\.]+)\s*(?:METRIC TONS|MT|Tons)"],
-}
-
-def extract_vessel_info_text(text: str) -> Dict:
-    out = {}
-    for field, pats in VESSEL_PATTERNS.items():
-        val = "-"
-        for p in pats:
-            m = re.search(p, text)
-            if m:
-                val = re.sub(r"^(AT|TO)\s+", "", m.group(1).strip(), flags=re.IGNORECASE)
-                break
-        out[field] = val
-    return out
-
-def extract_events_text(text: str) -> List[Dict]:
-    events = []
-    lines = [l.strip() for l in text.split("\n") if l.strip()]
-    current_date = ""
-    for line in lines:
-        # detect date headers
-        dm = re.search(r'(ON\s+[A-Z]+\s+\d{1,2},\s*\d{4}|\d{1,2}\.\d{1,2}\.\d{4}|[A-Z][a-z]{2,8}\.?\s*\d{1,2},\s*\d{4})', line, re.IGNORECASE)
-        if dm and len(line) <= 60:
-            current_date = norm_date(dm.group(1))
-            continue
-        # time range
-        tr = re.search(r'(\d{4})-(\d{4})', line)
-        if tr:
-            s = norm_time(tr.group(1)); e = norm_time(tr.group(2)); dur = calc_duration(s, e)
-            desc = line.split(tr.group(0), 1)[-1].strip() or "Loading Operations"
-            rem = "-"
-            low = line.lower()
-            if "rain" in low: rem="Weather delay"
-            elif "breakdown" in low: rem="Equipment failure"
-            elif "survey" in low: rem="Survey"
-            events.append({"Date": current_date or "-", "Start Time": s, "End Time": e, "Duration": dur, "Event Description": desc.title(), "Remarks": rem})
-            continue
-        # bullet with single time like "• 1600 HRS: ARRIVED"
-        bt = re.search(r'[•\-\*]?\s*(\d{3,4})\s*HRS?[:\-]?\s*(.+)', line, re.IGNORECASE)
-        if bt:
-            s = norm_time(bt.group(1)); desc = bt.group(2).strip()
-            rem = "-"
-            low = line.lower()
-            if "arriv" in low: rem="Arrival"
-            elif "sailed" in low or "depart" in low: rem="Departure"
-            events.append({"Date": current_date or "-", "Start Time": s, "End Time": "-", "Duration": "-", "Event Description": desc.title(), "Remarks": rem})
-            continue
-        # generic row with date + times
-        if current_date and re.search(r'\d{3,4}', line) and len(line) > 15:
-            single = re.search(r'(\d{3,4})(?!-)', line)
-            if single:
-                s = norm_time(single.group(1))
-                desc = line.split(single.group(1), 1)[-1].strip()
-                events.append({"Date": current_date or "-", "Start Time": s, "End Time": "-", "Duration": "-", "Event Description": desc.title() or "-", "Remarks": "-"})
-    # sort
-    def key(ev):
-        try:
-            dt = datetime.strptime(ev["Date"], "%d %b %Y")
-        except:
-            dt = datetime.min
-        try:
-            tm = datetime.strptime(ev["Start Time"], "%H:%M")
-        except:
-            tm = datetime.min
-        return (dt, tm)
-    events.sort(key=key)
-    return events or [{"Date":"-","Start Time":"-","End Time":"-","Duration":"-","Event Description":"-","Remarks":"-"}]
+# Provider strategy: "sequential" fallback chain, or "hedged" (providers race,
+# best result meeting the quality bar within SOF_HEDGE_BUDGET_S seconds wins)
+EXTRACT_MODE = os.getenv("SOF_EXTRACT_MODE", "sequential")
+HEDGE_BUDGET_S = float(os.getenv("SOF_HEDGE_BUDGET_S", "8"))
+
+# Circuit breakers + health scores decide which providers are tried, and in what order
+provider_router = ProviderRouter()
+
+# Upload limits: larger files are rejected, anything over the spool size goes to a temp file
+MAX_UPLOAD_BYTES = int(os.getenv("SOF_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+SPOOL_MEMORY_BYTES = int(os.getenv("SOF_SPOOL_MEMORY_MB", "1")) * 1024 * 1024
+# Batch extraction: files processed at once, max PDFs per request (ZIP members included), max request size
+BATCH_CONCURRENCY = int(os.getenv("SOF_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_FILES = int(os.getenv("SOF_BATCH_MAX_FILES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("SOF_BATCH_MAX_MB", "200")) * 1024 * 1024
+
+# PDF text extraction: thread for small files, process pool fan-out for large ones
+pdf_extractor = PdfTextExtractor(
+    workers=int(os.environ["PDF_WORKERS"]) if os.getenv("PDF_WORKERS") else None,
+    parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8")),
+)
+
+# On-demand profiling of /extract (?profile=true or X-SOF-Profile: 1, plus X-Admin-Token);
+# disabled unless SOF_ADMIN_TOKEN is set. Folded stacks are also saved to SOF_PROFILE_DIR if set
+ADMIN_TOKEN = os.getenv("SOF_ADMIN_TOKEN")
+PROFILE_INTERVAL_S = float(os.getenv("SOF_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("SOF_PROFILE_DIR") or None
+# The sampler sees every thread, so profiled requests run one at a time
+profile_lock = asyncio.Lock()
+
+# Background job queue for POST /jobs (state survives restarts in SQLite)
+job_queue = JobQueue(
+    JobStore(os.getenv("SOF_JOBS_DB", "jobs.db")),
+    runner=lambda upload: extract_cached(upload),
+    workers=int(os.getenv("SOF_JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("SOF_JOB_QUEUE_MAX", "100")),
+    on_result=lambda digest, filename, result: store_result(digest, filename, result),
+    spool_bytes=SPOOL_MEMORY_BYTES,
+)
+
+# Every extraction result (/extract, /extract/stream, /extract/batch, /jobs) is kept for /voyages and /events/search
+extraction_store = ExtractionStore(os.getenv("SOF_STORE_DB", "extractions.db"))
+SEARCH_MAX_LIMIT = 500
+
+LAYTIME_MAX_VOYAGES = int(os.getenv("SOF_LAYTIME_MAX_VOYAGES", "10000"))
 
 # ---- Azure Document Intelligence (uses prebuilt-layout) ----
-async def azure_extract(pdf_bytes: bytes) -> Optional[Dict]:
+async def azure_extract(upload: PdfUpload) -> Optional[Dict]:
     if not (AZURE_ENDPOINT and AZURE_KEY):
         return None
     headers = {"Ocp-Apim-Subscription-Key": AZURE_KEY, "Content-Type": "application/pdf"}
     analyze_url = f"{AZURE_ENDPOINT}/documentintelligence/documentModels/prebuilt-layout:analyze?api-version=2024-02-29-preview"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(analyze_url, headers=headers, data=pdf_bytes) as resp:
+    session = http_clients.session("azure")
+    with stage("azure_submit", "Azure Document Intelligence"), upload.open() as body:  # streamed from the spooled upload
+        async with session.post(analyze_url, headers=headers, data=body) as resp:
             if resp.status != 202:
-                raise HTTPException(400, f"Azure analyze error: {resp.status}")
+                raise HTTPException(upstream_status(resp.status), f"Azure analyze error: {resp.status}")
             op_loc = resp.headers.get("Operation-Location")
-        # poll
-        for _ in range(30):
-            await asyncio.sleep(1)
-            async with session.get(op_loc, headers={"Ocp-Apim-Subscription-Key": AZURE_KEY}) as r:
-                data = await r.json()
-                if data.get("status") == "succeeded":
-                    content = data.get("analyzeResult", {}).get("content", "")
-                    vessel = extract_vessel_info_text(content)
-                    events = extract_events_text(content)
-                    return {"vessel_info": vessel, "events": events, "api_used": "Azure Document Intelligence"}
-                if data.get("status") == "failed":
-                    raise HTTPException(400, "Azure analysis failed")
-    raise HTTPException(408, "Azure analysis timeout")
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+    # poll (shared poller, raises on failure/timeout)
+    with stage("azure_poll", "Azure Document Intelligence"):
+        data = await azure_poller.wait(op_loc, AZURE_KEY, retry_after)
+    analyze = data.get("analyzeResult", {})
+    content = analyze.get("content", "")
+    with stage("parse_vessel", "Azure Document Intelligence"):
+        vessel = extract_vessel_info_text(content)
+    with stage("parse_events", "Azure Document Intelligence"):
+        # Structured tables first; line regexes over the flattened content as fallback
+        events = extract_events_tables(analyze.get("tables") or []) or extract_events_text(content)
+    return {"vessel_info": vessel, "events": events, "api_used": "Azure Document Intelligence"}
+
+# ---- Local text parse (PyPDF2 + regex parsers; no credentials, the hedge in "hedged" mode) ----
+LOCAL_PARSE = "Local text parse"
+
+async def local_extract(upload: PdfUpload, provider: str = LOCAL_PARSE) -> Dict:
+    with stage("pdf_text", provider):
+        text = await pdf_extractor.text(upload.source)
+    with stage("parse_vessel", provider):
+        vessel = extract_vessel_info_text(text)
+    with stage("parse_events", provider):
+        events = extract_events_text(text)
+    return {"vessel_info": vessel, "events": events, "api_used": provider}
 
 # ---- Hugging Face path (text parsing with token presence, ensures config) ----
-async def hf_extract(pdf_bytes: bytes) -> Optional[Dict]:
+async def hf_extract(upload: PdfUpload) -> Optional[Dict]:
     if not HF_TOKEN:
         return None
     # For now, we parse text locally and mark API used; HF token ensures configured free API path
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-    text = ""
-    for p in reader.pages:
+    result = await local_extract(upload, "Hugging Face")
+    result["api_used"] = "Hugging Face (text parse)"
+    return result
+
+# ---- Extraction pipeline (provider fallback chain) ----
+def configured_providers(upload: PdfUpload) -> Dict:
+    providers = {}
+    # 1) Azure (best quality, free 500 pages/month) [1][2][4][8]
+    if AZURE_ENDPOINT and AZURE_KEY:
+        providers["Azure Document Intelligence"] = lambda: azure_extract(upload)
+    # 2) Hugging Face (free token) [6][9]
+    if HF_TOKEN:
+        providers["Hugging Face"] = lambda: hf_extract(upload)
+    return providers
+
+def best_api_used() -> str:
+    """api_used of the top-ranked provider's results (same order as configured_providers)."""
+    if AZURE_ENDPOINT and AZURE_KEY:
+        return "Azure Document Intelligence"
+    return "Hugging Face (text parse)" if HF_TOKEN else LOCAL_PARSE
+
+async def call_provider(name: str, fn):
+    try:
+        result = await provider_router.call(name, fn)
+    except asyncio.CancelledError:
+        metrics.PROVIDER_CALLS.inc(provider=name, outcome="cancelled")
+        raise
+    except Exception:
+        metrics.PROVIDER_CALLS.inc(provider=name, outcome="error")
+        raise
+    metrics.PROVIDER_CALLS.inc(provider=name, outcome="ok")
+    return result
+
+async def run_extraction(upload: PdfUpload, mode: Optional[str] = None) -> Dict:
+    providers = configured_providers(upload)
+    # Healthiest first; providers with an open circuit are skipped outright
+    order = provider_router.order(list(providers))
+    if (mode or EXTRACT_MODE) == "hedged":
+        # All providers start together with the local parse; the preferred acceptable result wins
+        candidates = [(name, lambda name=name: call_provider(name, providers[name])) for name in order]
+        if "Hugging Face" not in order:  # which already is the local parse
+            candidates.append((LOCAL_PARSE, lambda: local_extract(upload)))
+        return await hedged(candidates, HEDGE_BUDGET_S)
+
+    for name in order:
         try:
-            text += p.extract_text() + "\n"
-        except:
-            pass
-    vessel = extract_vessel_info_text(text)
-    events = extract_events_text(text)
-    return {"vessel_info": vessel, "events": events, "api_used": "Hugging Face (text parse)"}
+            return await call_provider(name, providers[name])
+        except Exception as e:
+            # fall through to the next provider
+            logger.warning("%s extraction failed: %s", name, getattr(e, "detail", e))
+
+    # If nothing configured (or nothing worked)
+    raise HTTPException(500, "No working API configured. Set HF_API_TOKEN or Azure keys in .env.")
+
+async def extract_cached(upload: PdfUpload, mode: Optional[str] = None) -> Dict:
+    cache_key = ResultCache.key(upload.digest, PARSER_VERSION)
+    cached = result_cache.get(cache_key)
+    metrics.CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+    result = await run_extraction(upload, mode)
+    # Only the top-ranked provider's result is reused. A fallback (e.g. the local parse
+    # during an Azure outage, or a lower-ranked hedge winner) is redone on the next upload
+    if result.get("api_used") == best_api_used():
+        result_cache.put(cache_key, result)
+    return result
+
+# ---- Streaming extraction (NDJSON / SSE) ----
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def encode_frame(frame: Dict, fmt: str) -> str:
+    data = dumps(frame).decode("utf-8")
+    return f"event: {frame['type']}\ndata: {data}\n\n" if fmt == "sse" else data + "\n"
+
+async def stream_extraction(upload: PdfUpload):
+    """Yield vessel_info, per-page events and a final summary frame.
+
+    Pages are parsed locally as they come out of PyPDF2. If Azure is
+    configured it runs alongside, and its result (when it succeeds) is
+    what the summary frame reports.
+    """
+    cached = result_cache.get(ResultCache.key(upload.digest, PARSER_VERSION))
+    if cached is not None:
+        yield {"type": "vessel_info", "vessel_info": cached["vessel_info"]}
+        yield {"type": "events", "page": None, "events": cached["events"]}
+        yield {"type": "summary", **cached}
+        return
+    azure_task = None
+    if AZURE_ENDPOINT and AZURE_KEY and provider_router.order(["Azure Document Intelligence"]):
+        azure_task = asyncio.create_task(call_provider("Azure Document Intelligence", lambda: azure_extract(upload)))
+    try:
+        parser = EventParser()
+        text, vessel, page = "", None, 0
+        async for page_text in pdf_extractor.iter_pages(upload.source):
+            page += 1
+            text += page_text
+            if vessel is None:
+                found = extract_vessel_info_text(text)
+                if found["Vessel Name"] != "-":
+                    vessel = found
+                    yield {"type": "vessel_info", "vessel_info": vessel}
+            events = parser.feed(page_text)
+            if events:
+                yield {"type": "events", "page": page, "events": events}
+        result = {"vessel_info": extract_vessel_info_text(text), "events": parser.finish(), "api_used": LOCAL_PARSE}
+        if vessel is None:
+            yield {"type": "vessel_info", "vessel_info": result["vessel_info"]}
+        if azure_task is not None:
+            try:
+                result = await azure_task
+                result_cache.put(ResultCache.key(upload.digest, PARSER_VERSION), result)
+            except Exception as e:
+                logger.warning("Azure extraction failed, streaming local parse: %s", getattr(e, "detail", e))
+        yield {"type": "summary", **result, "pages": page}
+    finally:
+        if azure_task is not None and not azure_task.done():
+            azure_task.cancel()
+
+# ---- Warm-up (GET /ready) ----
+WARM_SAMPLE = "M.V. WARM UP\nMaster: Capt. Test\nPort of Loading: Singapore\n10.06.2024\n0800-0900 NOR tendered\n0930 HRS: Commenced loading\n"
+WARM_TABLE = {"rowCount": 2, "columnCount": 3, "cells": [
+    {"rowIndex": 0, "columnIndex": 0, "content": "Date", "kind": "columnHeader"},
+    {"rowIndex": 0, "columnIndex": 1, "content": "From", "kind": "columnHeader"},
+    {"rowIndex": 0, "columnIndex": 2, "content": "Description", "kind": "columnHeader"},
+    {"rowIndex": 1, "columnIndex": 0, "content": "10.06.2024"},
+    {"rowIndex": 1, "columnIndex": 1, "content": "0800"},
+    {"rowIndex": 1, "columnIndex": 2, "content": "NOR tendered"},
+]}
+
+async def warm_imports():
+    # deferred by http_clients and pdf_text; numpy (laytime only) stays lazy
+    for name in ("aiohttp", "PyPDF2"):
+        await asyncio.to_thread(startup.timed_import, name)
+
+async def warm_parsers():
+    def run():
+        result = {"vessel_info": extract_vessel_info_text(WARM_SAMPLE), "events": extract_events_text(WARM_SAMPLE)}
+        result["events"] += extract_events_tables([WARM_TABLE]) or []
+        dumps(result)
+    await asyncio.to_thread(run)
+
+async def warm_providers():
+    # Open the pooled TLS connection; any HTTP status will do
+    if AZURE_ENDPOINT and AZURE_KEY:
+        async with http_clients.session("azure").head(AZURE_ENDPOINT) as response:
+            await response.read()
+
+# Give the request that woke the instance a head start
+WARMUP_DELAY_S = float(os.getenv("SOF_WARMUP_DELAY_S", "0.25"))
+# ...and wait at most this long for a gap in traffic before each step
+WARMUP_MAX_WAIT_S = float(os.getenv("SOF_WARMUP_MAX_WAIT_S", "5"))
+WARM_STEPS = {"imports": warm_imports, "parsers": warm_parsers, "pdf_workers": pdf_extractor.warm, "providers": warm_providers}
 
 # ---- Routes ----
 @app.get("/")
@@ -199,28 +351,140 @@ async def health():
         available.append("Azure Document Intelligence")
     if HF_TOKEN:
         available.append("Hugging Face")
-    return {"status": "healthy", "available_apis": available, "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "available_apis": available, "providers": provider_router.snapshot(), "cache": result_cache.stats(), "timestamp": datetime.now().isoformat()}
 
-@app.post("/extract")
-async def extract(pdf: UploadFile):
-    if not pdf.filename.lower().endswith(".pdf"):
-        raise HTTPException(400, "Only PDF files are supported")
-    pdf_bytes = await pdf.read()
+@app.get("/ready")
+async def ready():
+    startup.start(WARM_STEPS, max_wait=WARMUP_MAX_WAIT_S)  # no-op once started by the lifespan
+    return FastJSONResponse(startup.report(), status_code=200 if startup.ready else 503)
 
-    # 1) Try Azure (best quality, free 500 pages/month) [1][2][4][8]
-    if AZURE_ENDPOINT and AZURE_KEY:
-        try:
-            return await azure_extract(pdf_bytes)
-        except Exception as e:
-            # fall through to HF
-            pass
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
-    # 2) Try Hugging Face (free token) [6][9]
-    if HF_TOKEN:
+async def read_upload(request: Request):
+    # (filename, upload) of the "pdf" form field, spooled straight off the request body
+    with stage("upload_read"):
+        return await receive_pdf(request, "pdf", MAX_UPLOAD_BYTES, SPOOL_MEMORY_BYTES)
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(403, "Profiling requires a valid X-Admin-Token")
+
+def save_profile(report: Dict, digest: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{digest[:12]}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report["stacks"] + "\n")
+    report["saved_to"] = path
+
+async def profiled_extract(request: Request, mode: Optional[str]) -> Dict:
+    """Run /extract under the sampling profiler, bypassing the result cache."""
+    async with profile_lock:
+        with SamplingProfiler(PROFILE_INTERVAL_S) as profiler:
+            _, upload = await read_upload(request)
+            try:
+                result = await run_extraction(upload, mode)
+            finally:
+                upload.close()
+            body = dumps(result)
+    report = profiler.report()
+    if PROFILE_DIR:
+        await asyncio.to_thread(save_profile, report, upload.digest)
+    logger.info("Profiled /extract: %d samples over %.2fs", report["samples"], report["duration_s"])
+    return {**json.loads(body), "profile": report}
+
+async def store_result(digest: str, filename: str, result: Dict) -> None:
+    try:
+        with stage("store"):
+            await asyncio.to_thread(extraction_store.save, digest, filename, result, PARSER_VERSION)
+    except sqlite3.Error as e:
+        # history is best effort; the caller still gets the extraction
+        logger.warning("Could not store extraction of %s: %s", filename, e)
+
+# Upload routes read the multipart body themselves (see uploads.py), so the form is described here
+@app.post("/extract", openapi_extra=form_schema("pdf"))
+async def extract(request: Request, mode: Optional[str] = None, profile: bool = False,
+                  x_sof_profile: Optional[str] = Header(None), x_admin_token: Optional[str] = Header(None)):
+    if mode not in (None, "sequential", "hedged"):
+        raise HTTPException(400, "mode must be 'sequential' or 'hedged'")
+    if profile or x_sof_profile == "1":
+        require_admin(x_admin_token)
+        return await profiled_extract(request, mode)
+    filename, upload = await read_upload(request)
+    try:
+        result = await extract_cached(upload, mode)
+    finally:
+        upload.close()
+    await store_result(upload.digest, filename, result)
+    with stage("serialize"):
+        return FastJSONResponse(result)
+
+@app.post("/extract/stream", openapi_extra=form_schema("pdf"))
+async def extract_stream(request: Request, format: str = "ndjson"):
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(400, "format must be 'ndjson' or 'sse'")
+    filename, upload = await read_upload(request)
+
+    async def body():
         try:
-            return await hf_extract(pdf_bytes)
+            async for frame in stream_extraction(upload):
+                if frame["type"] == "summary":
+                    await store_result(upload.digest, filename, {k: v for k, v in frame.items() if k not in ("type", "pages")})
+                yield encode_frame(frame, format)
         except Exception as e:
-            pass
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield encode_frame({"type": "error", "detail": detail}, format)
+        finally:
+            upload.close()
 
-    # 3) If nothing configured
-    raise HTTPException(500, "No working API configured. Set HF_API_TOKEN or Azure keys in .env.")
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[format])
+
+@app.post("/extract/batch", openapi_extra=form_schema("files", many=True))
+async def extract_batch(request: Request):
+    with stage("upload_read"):
+        files = await receive_files(request, "files", BATCH_MAX_BYTES, BATCH_MAX_BYTES + FORM_OVERHEAD, SPOOL_MEMORY_BYTES, pdf_only=False)
+    return await run_batch(files, extract_cached, BATCH_CONCURRENCY, BATCH_MAX_FILES, MAX_UPLOAD_BYTES, on_result=store_result)
+
+@app.post("/jobs", status_code=202, openapi_extra=form_schema("pdf"))
+async def create_job(request: Request):
+    filename, upload = await read_upload(request)
+    try:
+        job_id = await job_queue.submit(filename, upload)
+    finally:
+        upload.close()
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+@app.get("/voyages")
+async def list_voyages(vessel: Optional[str] = None, port: Optional[str] = None, agent: Optional[str] = None,
+                       limit: int = Query(50, ge=1, le=SEARCH_MAX_LIMIT), offset: int = Query(0, ge=0)):
+    voyages = await asyncio.to_thread(extraction_store.voyages, vessel, port, agent, limit, offset)
+    return {"count": len(voyages), "voyages": voyages}
+
+@app.get("/voyages/{voyage_id}")
+async def get_voyage(voyage_id: int):
+    voyage = await asyncio.to_thread(extraction_store.voyage, voyage_id)
+    if voyage is None:
+        raise HTTPException(404, "Voyage not found")
+    return voyage
+
+@app.get("/events/search")
+async def search_events(q: str, vessel: Optional[str] = None,
+                        limit: int = Query(50, ge=1, le=SEARCH_MAX_LIMIT), offset: int = Query(0, ge=0)):
+    events = await asyncio.to_thread(extraction_store.search_events, q, vessel, limit, offset)
+    return {"count": len(events), "events": events}
+
+@app.post("/laytime/batch")
+async def laytime_batch(batch: LaytimeBatch):
+    if len(batch.voyages) > LAYTIME_MAX_VOYAGES:
+        raise HTTPException(413, f"At most {LAYTIME_MAX_VOYAGES} voyages per request")
+    with stage("laytime"):
+        results = await asyncio.to_thread(compute_batch, batch.voyages)
+    return {"count": len(results), "voyages": results}
@@ -0,0 +1,143 @@
+"""Minimal Prometheus metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms with labels, kept in a module-level
+registry and rendered by the /metrics route. `stage()` times a block of
+the extraction pipeline into the shared stage histogram, labelled with
+the provider and whether the block raised.
+"""
+
+import json, time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Prometheus client defaults, stretched for slow provider calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, list] = {}  # per-bucket counts + [count, sum]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            bounds = [_num(b) for b in self.buckets] + ["+Inf"]
+            for bound, n in zip(bounds, series[:-1]):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, 'le=%s' % json.dumps(bound))} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-2]}")
+        return lines
+
+
+registry: List[_Metric] = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = Histogram("sof_stage_seconds", "Time spent in each extraction stage", ("stage", "provider", "outcome"))
+HTTP_SECONDS = Histogram("sof_http_request_seconds", "HTTP request latency until response headers", ("method", "route", "status"))
+HTTP_INFLIGHT = Gauge("sof_http_requests_in_flight", "HTTP requests currently being handled", ("method", "route"))
+PROVIDER_CALLS = Counter("sof_provider_calls_total", "Extraction provider calls", ("provider", "outcome"))
+CACHE_LOOKUPS = Counter("sof_cache_lookups_total", "Result cache lookups", ("result",))
+LLM_CACHE_LOOKUPS = Counter("sof_llm_cache_lookups_total", "LLM response cache lookups", ("result",))
+
+
+@contextmanager
+def stage(name: str, provider: str = ""):
+    """Time a pipeline stage; outcome is "error" if the block raises."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name, provider=provider, outcome=outcome)
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Azure Document Intelligence (prebuilt-layout)
+Usage: python mock_azure.py [--port 8765] [--latency 2.0] [--submit-failure-rate 0.05]
+
+Implements the analyze submit (202 + Operation-Location) and result polling
+protocol that azure_extract and the shared poller use. Analysis "runs" for a
+configurable latency, and the result's content is the PDF text from PyPDF2.
+Point the app at it with:
+
+    AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT=http://127.0.0.1:8765
+    AZURE_DOCUMENT_INTELLIGENCE_KEY=mock
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+from pdf_text import page_count, page_texts
+
+ANALYZE_PATH = "/documentintelligence/documentModels/prebuilt-layout:analyze"
+RESULT_PATH = "/documentintelligence/documentModels/prebuilt-layout/analyzeResults/{op_id}"
+
+
+class MockAzure:
+    def __init__(self, latency: float, jitter: float, retry_after: int,
+                 submit_failure_rate: float, analysis_failure_rate: float, throttle_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.submit_failure_rate = submit_failure_rate
+        self.analysis_failure_rate = analysis_failure_rate
+        self.throttle_rate = throttle_rate
+        self.ops = {}
+        self.counts = {"submitted": 0, "polls": 0, "throttled": 0, "submit_failed": 0, "succeeded": 0, "failed": 0}
+
+    async def analyze(self, request: web.Request) -> web.Response:
+        if not request.headers.get("Ocp-Apim-Subscription-Key"):
+            return web.json_response({"error": {"code": "401", "message": "Access denied"}}, status=401)
+        body = await request.read()
+        if random.random() < self.throttle_rate:
+            self.counts["throttled"] += 1
+            return web.json_response({"error": {"code": "429", "message": "Rate limit exceeded"}},
+                                     status=429, headers={"Retry-After": str(self.retry_after)})
+        if random.random() < self.submit_failure_rate:
+            self.counts["submit_failed"] += 1
+            return web.json_response({"error": {"code": "InternalServerError"}}, status=500)
+        if not body.startswith(b"%PDF-"):
+            return web.json_response({"error": {"code": "InvalidContent"}}, status=400)
+
+        op_id = str(uuid.uuid4())
+        duration = max(0.0, random.gauss(self.latency, self.jitter))
+        self.ops[op_id] = {
+            "ready_at": time.monotonic() + duration,
+            "fail": random.random() < self.analysis_failure_rate,
+            "content": asyncio.create_task(asyncio.to_thread(self._content, body)),
+        }
+        self.counts["submitted"] += 1
+        location = str(request.url.with_path(RESULT_PATH.format(op_id=op_id)).with_query({"api-version": request.query.get("api-version", "")}))
+        return web.Response(status=202, headers={"Operation-Location": location, "Retry-After": str(self.retry_after)})
+
+    async def result(self, request: web.Request) -> web.Response:
+        self.counts["polls"] += 1
+        op = self.ops.get(request.match_info["op_id"])
+        if op is None:
+            return web.json_response({"error": {"code": "NotFound"}}, status=404)
+        if time.monotonic() < op["ready_at"]:
+            return web.json_response({"status": "running"}, headers={"Retry-After": str(self.retry_after)})
+        self.ops.pop(request.match_info["op_id"])
+        if op["fail"]:
+            self.counts["failed"] += 1
+            return web.json_response({"status": "failed", "error": {"code": "InternalServerError"}})
+        self.counts["succeeded"] += 1
+        content = await op["content"]
+        return web.json_response({"status": "succeeded", "analyzeResult": {"apiVersion": request.query.get("api-version", ""),
+                                                                          "modelId": "prebuilt-layout", "content": content}})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.counts, "running": len(self.ops)})
+
+    @staticmethod
+    def _content(pdf: bytes) -> str:
+        try:
+            return "\n".join(page_texts(pdf, 0, page_count(pdf)))
+        except Exception:
+            return ""
+
+
+def make_app(mock: MockAzure) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post(ANALYZE_PATH, mock.analyze)
+    app.router.add_get(RESULT_PATH, mock.result)
+    app.router.add_get("/stats", mock.stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Azure Document Intelligence server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0, help="mean analysis time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="std deviation of analysis time")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After header value (seconds)")
+    parser.add_argument("--submit-failure-rate", type=float, default=0.0, help="fraction of submits answered with 500")
+    parser.add_argument("--analysis-failure-rate", type=float, default=0.0, help="fraction of analyses ending 'failed'")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of submits answered with 429")
+    args = parser.parse_args()
+
+    mock = MockAzure(args.latency, args.jitter, args.retry_after,
+                     args.submit_failure_rate, args.analysis_failure_rate, args.throttle_rate)
+    print(f"🧪 Mock Azure Document Intelligence on http://{args.host}:{args.port} (stats at /stats)")
+    web.run_app(make_app(mock), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
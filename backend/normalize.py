@@ -0,0 +1,178 @@
+"""Date/time normalization for SOF fields.
+
+SOFs repeat the same handful of dates and times on every row, so each
+normalizer is memoized with a bounded LRU cache. Regexes are compiled
+once, month names and clock times come from precomputed tables, and
+durations are plain minute arithmetic instead of strptime. The column
+functions normalize a whole table column in one call, parsing each
+distinct cell once.
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+CACHE_SIZE = 4096
+MISSING = -1  # unparseable day / minute; sorts before every real value
+
+MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+MONTH_NAMES = ("JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE", "JULY", "AUGUST",
+               "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER")
+# full upper-case month name -> abbreviation, and 1-based month number -> abbreviation
+MONTH_BY_NAME = dict(zip(MONTH_NAMES, MONTH_ABBR))
+MONTH_BY_NUMBER = ("",) + MONTH_ABBR
+MONTH_NUMBER = {abbr.lower(): i for i, abbr in enumerate(MONTH_ABBR, 1)}
+
+# every clock time of the day: "HHMM" -> "HH:MM", minute index -> "HH:MM"
+CLOCK = [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)]
+HHMM = {c.replace(":", ""): c for c in CLOCK}
+# minutes between two times (0..1439) -> duration label
+DURATION = [f"{m / 60:.1f}h" if (m / 60) % 1 else f"{m // 60}h" for m in range(1440)]
+
+_DIGITS_3_4 = re.compile(r"\d{3,4}")
+_CLOCK = re.compile(r"^(\d{1,2}):(\d{2})$")
+_ON_DATE = re.compile(r'ON\s+([A-Z]+)\s+(\d{1,2}),\s*(\d{4})', re.IGNORECASE)
+_NUMERIC_DATE = re.compile(r'(\d{1,2})([./-])(\d{1,2})\2(\d{4})')
+_NAMED_DATE = re.compile(r'([A-Z][a-z]{2,8})\.?\s*(\d{1,2}),\s*(\d{4})')
+_CELL_TIME = re.compile(r"(\d{1,2}):?(\d{2})")
+_CELL_RANGE = re.compile(r"(\d{1,2}:?\d{2})\s*(?:-|–|to)\s*(\d{1,2}:?\d{2})", re.IGNORECASE)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_time(t: str) -> str:
+    """"800"/"0800" -> "08:00", "8:00" -> "08:00"; anything else unchanged."""
+    t = t.strip()
+    if t in HHMM:
+        return HHMM[t]
+    if _DIGITS_3_4.fullmatch(t):
+        t = t.zfill(4)
+        return f"{t[:2]}:{t[2:]}"
+    return t.zfill(5) if _CLOCK.match(t) else t
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def minute_of_day(t: str) -> int:
+    """Minutes since midnight for "H:M"-style times (as strptime's %H:%M), else MISSING."""
+    if not t.isascii():
+        # rare; let strptime apply its exact digit rules
+        try:
+            tm = datetime.strptime(t, "%H:%M")
+        except ValueError:
+            return MISSING
+        return tm.hour * 60 + tm.minute
+    hh, sep, mm = t.partition(":")
+    if not sep or not (hh.isdecimal() and mm.isdecimal()) or len(hh) > 2 or len(mm) > 2:
+        return MISSING
+    h, m = int(hh), int(mm)
+    return h * 60 + m if h < 24 and m < 60 else MISSING
+
+
+def calc_duration(s: str, e: str) -> str:
+    """Duration between two "HH:MM" times, wrapping past midnight; "-" if either is invalid."""
+    start, end = minute_of_day(s), minute_of_day(e)
+    if start == MISSING or end == MISSING:
+        return "-"
+    return DURATION[(end - start) % 1440]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_date(d: str) -> str:
+    """"ON JUNE 10, 2024", "10.06.2024" (or 10/06/2024, 10-06-2024) or "Jun. 10, 2024" -> "10 Jun 2024"; else unchanged."""
+    d = d.strip()
+    m1 = _ON_DATE.search(d)
+    if m1:
+        mon, day, year = m1.groups()
+        mon = MONTH_BY_NAME.get(mon.upper(), mon[:3])
+        return f"{day.zfill(2)} {mon} {year}"
+    m2 = _NUMERIC_DATE.search(d)
+    if m2:
+        day, _, mon, year = m2.groups()
+        try:
+            return f"{day.zfill(2)} {MONTH_BY_NUMBER[int(mon)]} {year}"
+        except IndexError:
+            return d
+    m3 = _NAMED_DATE.search(d)
+    if m3:
+        mon, day, year = m3.groups()
+        return f"{day.zfill(2)} {mon[:3]} {year}"
+    return d
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_numeric_date(date_str: str) -> str:
+    """"10.06.2024" or "10/06/2024" -> "10 Jun 2024" (month numbers over 12 are kept)."""
+    if '.' in date_str:
+        parts = date_str.split('.')
+    elif '/' in date_str:
+        parts = date_str.split('/')
+    else:
+        return date_str
+    if len(parts) != 3:
+        return date_str
+    day, month, year = parts
+    try:
+        month_name = MONTH_BY_NUMBER[int(month)] if int(month) <= 12 else month
+    except (ValueError, IndexError):
+        return date_str
+    return f"{day.zfill(2)} {month_name} {year}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def day_ordinal(text: str) -> int:
+    """Proleptic ordinal of a "DD Mon YYYY" date (as produced by norm_date), else MISSING."""
+    if not text.isascii() or text != text.strip():
+        # rare; let strptime apply its exact whitespace/digit rules
+        try:
+            return datetime.strptime(text, "%d %b %Y").toordinal()
+        except ValueError:
+            return MISSING
+    parts = text.split()
+    if len(parts) != 3:
+        return MISSING
+    day, mon, year = parts
+    month = MONTH_NUMBER.get(mon.lower())
+    if month is None or not (day.isdecimal() and len(day) <= 2) or not (year.isdecimal() and len(year) == 4):
+        return MISSING
+    try:
+        return date(int(year), month, int(day)).toordinal()
+    except ValueError:
+        return MISSING
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cell_time(cell: str) -> str:
+    """A table cell's time ("0800", "8:00", "08:00 hrs") as "HH:MM"; "-" if it holds none."""
+    if not cell:
+        return "-"
+    if cell.isdigit() and 3 <= len(cell) <= 4:
+        return norm_time(cell)
+    m = _CELL_TIME.search(cell)
+    return f"{m.group(1).zfill(2)}:{m.group(2)}" if m else "-"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cell_time_range(cell: str) -> Tuple[str, str]:
+    """A table cell's "0800-1000" / "08:00 to 10:00" range as (start, end); a single time has end "-"."""
+    m = _CELL_RANGE.search(cell)
+    return (cell_time(m.group(1)), cell_time(m.group(2))) if m else (cell_time(cell), "-")
+
+
+# ---- Column forms ----
+def time_column(cells: Sequence[str]) -> List[str]:
+    """cell_time over a whole column."""
+    parsed = {cell: cell_time(cell) for cell in set(cells)}
+    return [parsed[cell] for cell in cells]
+
+
+def time_range_column(cells: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """cell_time_range over a whole column, as (starts, ends)."""
+    parsed = {cell: cell_time_range(cell) for cell in set(cells)}
+    pairs = [parsed[cell] for cell in cells]
+    return [s for s, _ in pairs], [e for _, e in pairs]
+
+
+def duration_column(starts: Sequence[str], ends: Sequence[str]) -> List[str]:
+    """calc_duration over paired columns (e.g. a table's from/to columns)."""
+    parsed = {pair: calc_duration(*pair) for pair in set(zip(starts, ends))}
+    return [parsed[pair] for pair in zip(starts, ends)]
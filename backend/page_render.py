@@ -0,0 +1,103 @@
+"""Render PDF pages to compact images for image-based models.
+
+Pages are rasterized with pdfium in a process pool (pdfium is not thread
+safe), converted to grayscale, downscaled so the longer side fits
+`max_side`, and JPEG-compressed. Rendered pages are kept in a byte-bounded
+LRU keyed by a hash of the document digest, page index and render
+settings, so retries and repeat uploads never render a page twice.
+
+pypdfium2 and Pillow are optional; without them `available` is False and
+`images()` raises.
+"""
+
+import asyncio, hashlib, io
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+try:
+    import pypdfium2 as pdfium
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    pdfium = Image = None
+
+from pdf_text import Source, default_workers, page_count, spawn_pool
+
+
+def render_page(source: Source, index: int, dpi: int, max_side: int, quality: int) -> bytes:
+    """One page as a grayscale JPEG."""
+    pdf = pdfium.PdfDocument(source)
+    try:
+        bitmap = pdf[index].render(scale=dpi / 72, grayscale=True)
+        image = bitmap.to_pil().convert("L")
+    finally:
+        pdf.close()
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+class PageRenderer:
+    def __init__(self, dpi: int = 100, max_side: int = 1600, quality: int = 70,
+                 cache_bytes: int = 64 * 1024 * 1024, workers: Optional[int] = None):
+        self.dpi = dpi
+        self.max_side = max_side
+        self.quality = quality
+        self.cache_bytes = cache_bytes
+        self.workers = workers if workers is not None else default_workers()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        return pdfium is not None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = spawn_pool(self.workers)
+        return self._pool
+
+    def page_key(self, digest: str, index: int) -> str:
+        settings = f"{digest}:{index}:{self.dpi}:{self.max_side}:{self.quality}"
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+    async def images(self, source: Source, digest: str, pages: Optional[Sequence[int]] = None) -> List[bytes]:
+        """JPEG bytes of the given pages (default: all), rendering only uncached ones, in parallel."""
+        if not self.available:
+            raise RuntimeError("Page rendering needs pypdfium2 and Pillow")
+        if pages is None:
+            pages = range(await asyncio.to_thread(page_count, source))
+        keys = [self.page_key(digest, i) for i in pages]
+        found = {}
+        for key in keys:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                found[key] = self._cache[key]
+        missing = {key: i for i, key in zip(pages, keys) if key not in found}
+        if missing:
+            loop = asyncio.get_running_loop()
+            pool = self._executor()
+            rendered = await asyncio.gather(*[
+                loop.run_in_executor(pool, render_page, source, i, self.dpi, self.max_side, self.quality)
+                for i in missing.values()
+            ])
+            for key, image in zip(missing, rendered):
+                found[key] = image
+                self._remember(key, image)
+        return [found[key] for key in keys]
+
+    def _remember(self, key: str, image: bytes) -> None:
+        if key in self._cache or len(image) > self.cache_bytes:
+            return
+        self._cache[key] = image
+        self._cached_bytes += len(image)
+        while self._cached_bytes > self.cache_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= len(old)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
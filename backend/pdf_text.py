@@ -0,0 +1,141 @@
+"""PyPDF2 text extraction kept off the event loop.
+
+Small documents are parsed in a worker thread. Larger ones are split into
+contiguous page ranges that are extracted in parallel by a process pool
+and stitched back together in page order. Each worker re-opens the PDF
+once for its whole range rather than once per page. PyPDF2 is imported on
+first use (or by the warm-up), not when the app starts.
+"""
+
+import asyncio, io, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, BinaryIO, List, Optional, Union
+
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+
+def default_workers() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return min(4, cpus)
+
+
+def spawn_pool(workers: int) -> ProcessPoolExecutor:
+    """A process pool for PDF work (text extraction here, page rendering in page_render)."""
+    # spawn: forking a process that already runs threads is unsafe
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+# A source is the PDF bytes or the path of a spooled upload
+Source = Union[bytes, str]
+
+
+def _open(source: Source) -> BinaryIO:
+    return open(source, "rb") if isinstance(source, str) else io.BytesIO(source)
+
+
+def _reader(f: BinaryIO) -> "PdfReader":
+    from PyPDF2 import PdfReader
+
+    return PdfReader(f)
+
+
+def _preload() -> None:
+    import PyPDF2  # noqa: F401
+
+
+def page_count(source: Source) -> int:
+    with _open(source) as f:
+        return len(_reader(f).pages)
+
+
+def _page_text(reader: "PdfReader", i: int) -> str:
+    try:
+        return reader.pages[i].extract_text() + "\n"
+    except Exception:
+        return ""
+
+
+def page_texts(source: Source, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop), each with a trailing newline ('' if unreadable)."""
+    with _open(source) as f:
+        reader = _reader(f)
+        return [_page_text(reader, i) for i in range(start, stop)]
+
+
+class PdfTextExtractor:
+    def __init__(self, workers: Optional[int] = None, parallel_min_pages: int = 8):
+        self.workers = workers if workers is not None else default_workers()
+        self.parallel_min_pages = parallel_min_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = spawn_pool(self.workers)
+        return self._pool
+
+    def _ranges(self, n: int, parts: int) -> List[range]:
+        parts = max(1, min(parts, n))
+        size, extra = divmod(n, parts)
+        ranges, start = [], 0
+        for i in range(parts):
+            stop = start + size + (1 if i < extra else 0)
+            ranges.append(range(start, stop))
+            start = stop
+        return ranges
+
+    async def pages(self, source: Source) -> List[str]:
+        n = await asyncio.to_thread(page_count, source)
+        if self.workers <= 1 or n < self.parallel_min_pages:
+            return await asyncio.to_thread(page_texts, source, 0, n)
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        parts = await asyncio.gather(*[
+            # spooled uploads are passed by path so workers read the file directly
+            loop.run_in_executor(pool, page_texts, source, r.start, r.stop) for r in self._ranges(n, self.workers)
+        ])
+        return [text for part in parts for text in part]
+
+    async def iter_pages(self, source: Source) -> AsyncIterator[str]:
+        """Yield page texts in order as soon as each one is available."""
+        n = await asyncio.to_thread(page_count, source)
+        if self.workers <= 1 or n < self.parallel_min_pages:
+            # keep one reader open and extract a page per thread hop
+            with _open(source) as f:
+                reader = await asyncio.to_thread(_reader, f)
+                for i in range(n):
+                    yield await asyncio.to_thread(_page_text, reader, i)
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        # smaller ranges than pages() so the first pages come back sooner
+        futures = [
+            loop.run_in_executor(pool, page_texts, source, r.start, r.stop)
+            for r in self._ranges(n, self.workers * 4)
+        ]
+        try:
+            for fut in futures:
+                for text in await fut:
+                    yield text
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+    async def warm(self) -> None:
+        """Start the worker processes (and their PyPDF2 import) ahead of the first large PDF."""
+        if self.workers <= 1:
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        await asyncio.gather(*[loop.run_in_executor(pool, _preload) for _ in range(self.workers)])
+
+    async def text(self, source: Source) -> str:
+        return "".join(await self.pages(source))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,68 @@
+"""Token-bucket rate limiting and retrying POSTs for provider APIs.
+
+Callers share one bucket per provider, so concurrent requests (e.g. the
+Hugging Face document-QA questions) go out together while staying under
+the provider's request rate. 429 and 503 responses are retried after the
+delay the provider asks for (Retry-After, or HF's `estimated_time` while a
+model is loading), falling back to exponential backoff with jitter.
+"""
+
+import asyncio, os, random, time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from azure_poller import parse_retry_after
+
+RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _backoff(response: aiohttp.ClientResponse, body: Any, attempt: int, base: float, cap: float) -> float:
+    delay = parse_retry_after(response.headers.get("Retry-After"))
+    if delay is None and isinstance(body, dict):
+        delay = body.get("estimated_time")
+    if delay is None:
+        delay = random.uniform(0, base * 2 ** attempt)
+    return min(float(delay), cap)
+
+
+async def post_json(session: aiohttp.ClientSession, bucket: TokenBucket, url: str, *, headers: Dict, json: Any,
+                    retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 30.0) -> Tuple[int, Optional[Any]]:
+    """POST under the rate limit; returns (status, parsed JSON body or None)."""
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        async with session.post(url, headers=headers, json=json) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = None
+            if response.status not in RETRY_STATUSES or attempt == retries:
+                return response.status, body
+            delay = _backoff(response, body, attempt, backoff_base, backoff_cap)
+        await asyncio.sleep(delay)
+
+
+# Hugging Face Inference API: free accounts get a few requests per second
+HF_BUCKET = TokenBucket(float(os.getenv("HF_RATE_PER_S", "4")), int(os.getenv("HF_BURST", "8")))
+HF_MAX_RETRIES = int(os.getenv("HF_MAX_RETRIES", "3"))
@@ -0,0 +1,129 @@
+"""Content-addressed cache for SOF extraction results (and LLM responses).
+
+Entries are keyed by the SHA-256 of the PDF bytes plus a parser version, so
+re-uploading the same document returns the previous result without calling
+Azure or re-parsing it. A small in-memory LRU sits in front of an optional
+on-disk tier that is trimmed least-recently-used first once it grows past
+its byte budget. With a `ttl`, entries older than that many seconds are
+treated as misses (disk files keep their write time as mtime and their last
+use as atime).
+"""
+
+import json, os, time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None, disk_max_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self._mem: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()  # key -> (stored at, value)
+        self._disk_bytes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(st.st_size for _, st in self._disk_files())
+
+    @staticmethod
+    def key(digest: str, version: str) -> str:
+        """Cache key from the PDF's SHA-256 hex digest and the parser version."""
+        return digest + "-" + version
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._mem.get(key)
+        if entry is not None and self._fresh(entry[0]):
+            self._mem.move_to_end(key)
+            self.hits["memory"] += 1
+            return dict(entry[1])
+        entry = self._disk_get(key)
+        if entry is not None:
+            self._remember(key, entry[1], entry[0])
+            self.hits["disk"] += 1
+            return dict(entry[1])
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict) -> None:
+        self._remember(key, value, time.time())
+        if self.disk_dir:
+            self._disk_put(key, value)
+
+    def stats(self) -> Dict:
+        return {
+            "hits": sum(self.hits.values()),
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "entries": len(self._mem),
+            "disk_bytes": self._disk_bytes if self.disk_dir else None,
+        }
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl is None or time.time() - stored_at < self.ttl
+
+    # ---- memory tier ----
+    def _remember(self, key: str, value: Dict, stored_at: float) -> None:
+        self._mem[key] = (stored_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    # ---- disk tier ----
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key + ".json")
+
+    def _disk_files(self):
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                p = os.path.join(self.disk_dir, name)
+                yield p, os.stat(p)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, Dict]]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if not self._fresh(stored_at):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path, (time.time(), stored_at))  # refresh recency for eviction, keep the write time
+            return stored_at, value
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value: Dict) -> None:
+        path = self._path(key)
+        data = json.dumps(value, default=dict).encode("utf-8")  # default: Mapping values such as events
+        if len(data) > self.disk_max_bytes:
+            return
+        try:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self._disk_bytes += len(data) - old
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the budget so we don't evict on every write; expired entries go first
+        target = int(self.disk_max_bytes * 0.9)
+        for path, _ in sorted(self._disk_files(), key=lambda f: (self._fresh(f[1].st_mtime), f[1].st_atime)):
+            if self._disk_bytes <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._disk_bytes -= size
+            except OSError:
+                pass
@@ -0,0 +1,87 @@
+"""Compact event records and fast JSON encoding.
+
+An Event keeps the six display strings in slots, plus the day ordinal and
+minute of day parsed once when it is built, so sorting compares two ints
+instead of calling strptime per comparison key. Events read like the old
+six-key dicts (`ev["Date"]`, `ev.get(...)`, `dict(ev)`), so existing
+consumers keep working. `dumps` encodes them with orjson when available.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+from fastapi.responses import JSONResponse
+
+from normalize import day_ordinal, minute_of_day
+
+KEYS = ("Date", "Start Time", "End Time", "Duration", "Event Description", "Remarks")
+_ATTRS = ("date", "start", "end", "duration", "description", "remarks")
+_ATTR_OF = dict(zip(KEYS, _ATTRS))
+
+
+class Event(Mapping):
+    __slots__ = _ATTRS + ("day", "minute")
+
+    def __init__(self, date: str = "-", start: str = "-", end: str = "-", duration: str = "-",
+                 description: str = "-", remarks: str = "-"):
+        self.date = date
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.description = description
+        self.remarks = remarks
+        self.day = day_ordinal(date)
+        self.minute = minute_of_day(start)
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return getattr(self, _ATTR_OF[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(KEYS)
+
+    def __len__(self) -> int:
+        return len(KEYS)
+
+    def __repr__(self) -> str:
+        return f"Event({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"Date": self.date, "Start Time": self.start, "End Time": self.end, "Duration": self.duration,
+                "Event Description": self.description, "Remarks": self.remarks}
+
+
+def sort_key(ev) -> tuple:
+    """Chronological key for an Event or a plain event dict."""
+    if isinstance(ev, Event):
+        return (ev.day, ev.minute)
+    return (day_ordinal(ev.get("Date", "-")), minute_of_day(ev.get("Start Time", "-")))
+
+
+def _default(obj: Any):
+    if isinstance(obj, Event):
+        return obj.to_dict()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes Events directly (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,23 +2,53 @@
 # Author: Advanced Document Processing System
 # Date: August 2025
 
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 import requests
 import base64
+import hashlib
 import json
 import os
 from dotenv import load_dotenv
 from datetime import datetime
 import re
 from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
 import asyncio
 import aiohttp
+import logging
+from http_clients import http_clients
+from azure_poller import azure_poller, parse_retry_after
+from uploads import PdfUpload, form_schema, receive_pdf
+from result_cache import ResultCache
+from pdf_text import PdfTextExtractor, page_count
+from page_render import PageRenderer
+from sof_parser import extract_vessel_info_text, extract_events_text
+from normalize import calc_duration, norm_numeric_date
+from hedge import hedged
+from breakers import ProviderRouter, upstream_status
+from sof_events import FastJSONResponse
+from llm_chunks import chunk_pages, merge_events, merge_vessel_info
+from rate_limit import HF_BUCKET, HF_MAX_RETRIES, post_json
+import metrics
+from metrics import stage
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="SOF Document Extractor", version="2.0.0")
+logger = logging.getLogger("sof")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the Azure poller and close pooled provider sessions on shutdown
+    await azure_poller.close()
+    await http_clients.close()
+    pdf_extractor.shutdown()
+    page_renderer.shutdown()
+
+app = FastAPI(title="SOF Document Extractor", version="2.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +80,26 @@ class APIConfig:
 
 config = APIConfig()
 
+# Upload limits (same settings as main.py)
+MAX_UPLOAD_BYTES = int(os.getenv("SOF_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+SPOOL_MEMORY_BYTES = int(os.getenv("SOF_SPOOL_MEMORY_MB", "1")) * 1024 * 1024
+
+# "sequential" tries providers in order; "hedged" races them against a local text parse
+EXTRACT_MODE = os.getenv("SOF_EXTRACT_MODE", "sequential")
+HEDGE_BUDGET_S = float(os.getenv("SOF_HEDGE_BUDGET_S", "8"))
+
+pdf_extractor = PdfTextExtractor()
+
+# Page images for the document-QA model: DPI, longest side in pixels, JPEG quality, cache size
+page_renderer = PageRenderer(
+    dpi=int(os.getenv("PAGE_RENDER_DPI", "100")),
+    max_side=int(os.getenv("PAGE_MAX_SIDE", "1600")),
+    quality=int(os.getenv("PAGE_JPEG_QUALITY", "70")),
+    cache_bytes=int(os.getenv("PAGE_CACHE_MB", "64")) * 1024 * 1024,
+)
+# Pages of each SOF the header questions are asked about
+HF_QA_MAX_PAGES = int(os.getenv("HF_QA_MAX_PAGES", "2"))
+
 # =============================================================================
 # AZURE DOCUMENT INTELLIGENCE EXTRACTOR (BEST FOR PRODUCTION)
 # =============================================================================
@@ -59,7 +109,7 @@ class AzureDocumentIntelligence:
         self.endpoint = config.azure_endpoint
         self.key = config.azure_key
         
-    async def extract_sof_data(self, pdf_bytes: bytes) -> Dict:
+    async def extract_sof_data(self, upload: PdfUpload) -> Dict:
         """Extract SOF data using Azure Document Intelligence Layout API"""
         if not self.endpoint or not self.key:
             raise HTTPException(400, "Azure credentials not configured")
@@ -72,26 +122,19 @@ class AzureDocumentIntelligence:
         # Submit document for analysis
         analyze_url = f"{self.endpoint}/documentintelligence/documentModels/prebuilt-layout:analyze?api-version=2024-02-29-preview"
         
-        async with aiohttp.ClientSession() as session:
-            # Submit for analysis
-            async with session.post(analyze_url, headers=headers, data=pdf_bytes) as response:
+        session = http_clients.session("azure")
+        # Submit for analysis, streaming the spooled upload
+        with upload.open() as body:
+            async with session.post(analyze_url, headers=headers, data=body) as response:
                 if response.status != 202:
-                    raise HTTPException(400, f"Azure API error: {response.status}")
+                    raise HTTPException(upstream_status(response.status), f"Azure API error: {response.status}")
                 
                 operation_location = response.headers.get('Operation-Location')
-                
-            # Poll for results
-            result_headers = {'Ocp-Apim-Subscription-Key': self.key}
-            for _ in range(30):  # Wait up to 30 seconds
-                await asyncio.sleep(1)
-                async with session.get(operation_location, headers=result_headers) as result_response:
-                    result = await result_response.json()
-                    if result['status'] == 'succeeded':
-                        return self._parse_azure_result(result)
-                    elif result['status'] == 'failed':
-                        raise HTTPException(400, "Azure analysis failed")
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
             
-            raise HTTPException(408, "Azure analysis timeout")
+        # Poll for results via the shared poller (raises on failure or timeout)
+        result = await azure_poller.wait(operation_location, self.key, retry_after)
+        return self._parse_azure_result(result)
     
     def _parse_azure_result(self, azure_result: Dict) -> Dict:
         """Parse Azure Document Intelligence result into SOF format"""
@@ -276,24 +319,7 @@ class AzureDocumentIntelligence:
     
     def _normalize_date(self, date_str: str) -> str:
         """Normalize date to DD Mon YYYY format"""
-        # Handle various date formats
-        if '.' in date_str:
-            parts = date_str.split('.')
-        elif '/' in date_str:
-            parts = date_str.split('/')
-        else:
-            return date_str
-        
-        if len(parts) == 3:
-            day, month, year = parts
-            months = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            try:
-                month_name = months[int(month)] if int(month) <= 12 else month
-                return f"{day.zfill(2)} {month_name} {year}"
-            except (ValueError, IndexError):
-                return date_str
-        return date_str
+        return norm_numeric_date(date_str)
     
     def _normalize_time(self, time_str: str) -> str:
         """Normalize time to HH:MM format"""
@@ -302,15 +328,7 @@ class AzureDocumentIntelligence:
     
     def _calculate_duration(self, start_time: str, end_time: str) -> str:
         """Calculate duration between times"""
-        try:
-            start = datetime.strptime(start_time, '%H:%M')
-            end = datetime.strptime(end_time, '%H:%M')
-            if end < start:
-                end = end.replace(day=end.day + 1)
-            duration = (end - start).seconds / 3600
-            return f"{duration:.1f}h" if duration % 1 else f"{int(duration)}h"
-        except:
-            return "-"
+        return calc_duration(start_time, end_time)
 
 # =============================================================================
 # HUGGING FACE LAYOUTLM EXTRACTOR (COMPLETELY FREE)
@@ -321,21 +339,25 @@ class HuggingFaceExtractor:
         self.token = config.hf_token
         self.api_url = "https://api-inference.huggingface.co/models/microsoft/layoutlm-base-uncased"
         
-    async def extract_sof_data(self, pdf_bytes: bytes) -> Dict:
+    async def extract_sof_data(self, upload: PdfUpload) -> Dict:
         """Extract using Hugging Face LayoutLM API"""
         if not self.token:
             raise HTTPException(400, "Hugging Face token not configured")
         
         headers = {"Authorization": f"Bearer {self.token}"}
         
-        # Convert PDF to images first (you'd need pdf2image for this)
-        # For now, we'll use a text-based approach
-        
         # Use Hugging Face Document Question Answering
         qa_url = "https://api-inference.huggingface.co/models/impira/layoutlm-document-qa"
         
-        # Convert PDF bytes to base64 for API
-        pdf_b64 = base64.b64encode(pdf_bytes).decode()
+        # The header fields are on the first pages: render those once (cached), small grayscale JPEGs
+        if not page_renderer.available:
+            raise HTTPException(500, "Page rendering needs pypdfium2 and Pillow")
+        n_pages = await asyncio.to_thread(page_count, upload.source)
+        with stage("page_render", "Hugging Face"):
+            images = await page_renderer.images(upload.source, upload.digest, range(min(n_pages, HF_QA_MAX_PAGES)))
+        page_b64 = [base64.b64encode(image).decode() for image in images]
+        if not page_b64:
+            raise HTTPException(422, "PDF has no pages")
         
         questions = [
             "What is the vessel name?",
@@ -347,32 +369,35 @@ class HuggingFaceExtractor:
             "What is the quantity?"
         ]
         
-        vessel_info = {}
         field_names = ["Vessel Name", "Master", "Agent", "Port of Loading", 
                       "Port of Discharge", "Cargo", "Quantity (MT)"]
         
-        async with aiohttp.ClientSession() as session:
-            for i, question in enumerate(questions):
-                payload = {
-                    "inputs": {
-                        "question": question,
-                        "image": pdf_b64
-                    }
+        session = http_clients.session("huggingface")
+        
+        async def ask(question: str, image_b64: str) -> tuple:
+            """(score, answer) for one question about one page"""
+            payload = {
+                "inputs": {
+                    "question": question,
+                    "image": image_b64
                 }
-                
-                try:
-                    async with session.post(qa_url, headers=headers, json=payload) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            answer = result.get('answer', '-')
-                            vessel_info[field_names[i]] = answer
-                        else:
-                            vessel_info[field_names[i]] = "-"
-                except:
-                    vessel_info[field_names[i]] = "-"
-                
-                # Add delay to avoid rate limiting
-                await asyncio.sleep(1)
+            }
+            try:
+                status, result = await post_json(session, HF_BUCKET, qa_url, headers=headers,
+                                                 json=payload, retries=HF_MAX_RETRIES)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return (-1.0, "-")
+            if status == 200 and isinstance(result, list):
+                result = result[0] if result else None
+            if status == 200 and isinstance(result, dict) and result.get('answer'):
+                return (result.get('score') or 0.0, result['answer'])
+            return (-1.0, "-")
+        
+        # All questions about all pages go out together; the shared bucket keeps us under HF's rate limit
+        answers = await asyncio.gather(*[ask(q, image) for q in questions for image in page_b64])
+        # Best-scoring page answer per question
+        n = len(page_b64)
+        vessel_info = {field: max(answers[k * n:(k + 1) * n])[1] for k, field in enumerate(field_names)}
         
         # For events, we'll use a simpler text extraction approach
         events = [{"Date": "-", "Start Time": "-", "End Time": "-", 
@@ -387,18 +412,83 @@ class HuggingFaceExtractor:
 # OPENAI/GPT EXTRACTOR (FALLBACK)
 # =============================================================================
 
+# Chunking for long documents: token budget per request, parallel requests, lines repeated between chunks
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "3000"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_CHUNK_OVERLAP_LINES = int(os.getenv("LLM_CHUNK_OVERLAP_LINES", "3"))
+
+# Chunk responses are cached by model, prompt version and normalized chunk text.
+# Bump LLM_PROMPT_VERSION whenever the prompt or payload below changes.
+LLM_PROMPT_VERSION = "1"
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+
 class OpenAIExtractor:
     def __init__(self):
         self.api_key = config.openai_key or config.openrouter_key
         self.base_url = "https://openrouter.ai/api/v1" if config.openrouter_key else "https://api.openai.com/v1"
-        
-    async def extract_sof_data(self, pdf_text: str) -> Dict:
-        """Extract using OpenAI GPT with structured prompt"""
+        self.model = "deepseek/deepseek-r1" if "openrouter" in self.base_url else "gpt-3.5-turbo"
+        # Shared by all requests, so concurrent uploads can't exceed the limit together
+        self.semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        self.cache = ResultCache(
+            max_entries=int(os.getenv("LLM_CACHE_ENTRIES", "1024")),
+            disk_dir=os.getenv("LLM_CACHE_DIR") or None,
+            disk_max_bytes=int(os.getenv("LLM_CACHE_DISK_MB", "64")) * 1024 * 1024,
+            ttl=LLM_CACHE_TTL_S,
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}  # identical chunks share one request
+        
+    async def extract_sof_data(self, upload: PdfUpload) -> Dict:
+        """Extract using OpenAI GPT: one request per text chunk, answers merged"""
         if not self.api_key:
             raise HTTPException(400, "OpenAI/OpenRouter key not configured")
         
+        pages = await pdf_extractor.pages(upload.source)
+        chunks = chunk_pages(pages, LLM_CHUNK_TOKENS, LLM_CHUNK_OVERLAP_LINES)
+        if not chunks:
+            raise HTTPException(422, "PDF has no text layer")
+        
+        # Map: every chunk at once (bounded by the semaphore); any failure fails the document
+        tasks = [asyncio.ensure_future(self._cached_chunk(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        # Reduce: first value per vessel field, one deduplicated timeline
+        return {
+            "vessel_info": merge_vessel_info(r.get("vessel_info") for r in results),
+            "events": merge_events(r.get("events") for r in results)
+        }
+    
+    async def _cached_chunk(self, text: str) -> Dict:
+        """Chunk result from the cache, a request already in flight, or a new request"""
+        key = ResultCache.key(hashlib.sha256(f"{self.model}\n{text}".encode("utf-8")).hexdigest(), LLM_PROMPT_VERSION)
+        cached = self.cache.get(key)
+        metrics.LLM_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return dict(await asyncio.shield(pending))
+        future = asyncio.ensure_future(self._extract_chunk(text))
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._chunk_done(key, f))
+        # Shielded: a cancelled document doesn't abort a request other documents may be waiting on
+        return dict(await asyncio.shield(future))
+    
+    def _chunk_done(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+    
+    async def _extract_chunk(self, text: str) -> Dict:
+        # The prompt depends only on the chunk text, so responses can be cached (see LLM_PROMPT_VERSION)
         prompt = f"""
-        Extract the following information from this Statement of Facts document and return ONLY valid JSON:
+        Extract the following information from this Statement of Facts document and return ONLY valid JSON.
+        The text may be one part of a longer document: list every event it contains, and leave fields
+        empty when the text doesn't show them (e.g. the Date of events continuing from an earlier part).
 
         {{
           "vessel_info": {{
@@ -423,7 +513,7 @@ class OpenAIExtractor:
         }}
 
         Document text:
-        {pdf_text[:4000]}  # Limit to avoid token limits
+        {text}
         """
         
         headers = {
@@ -432,7 +522,7 @@ class OpenAIExtractor:
         }
         
         payload = {
-            "model": "deepseek/deepseek-r1" if "openrouter" in self.base_url else "gpt-3.5-turbo",
+            "model": self.model,
             "messages": [
                 {"role": "system", "content": "You are a document extraction expert. Return only valid JSON."},
                 {"role": "user", "content": prompt}
@@ -441,71 +531,116 @@ class OpenAIExtractor:
             "max_tokens": 2000
         }
         
-        async with aiohttp.ClientSession() as session:
+        session = http_clients.session("openai")
+        async with self.semaphore:
             async with session.post(f"{self.base_url}/chat/completions", 
                                   headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    content = result['choices'][0]['message']['content']
-                    
-                    # Clean and parse JSON
-                    json_start = content.find('{')
-                    json_end = content.rfind('}') + 1
-                    json_str = content[json_start:json_end]
-                    
-                    try:
-                        return json.loads(json_str)
-                    except json.JSONDecodeError:
-                        raise HTTPException(400, "Invalid JSON response from AI")
-                else:
-                    raise HTTPException(400, f"AI API error: {response.status}")
+                if response.status != 200:
+                    raise HTTPException(upstream_status(response.status), f"AI API error: {response.status}")
+                result = await response.json()
+        content = result['choices'][0]['message']['content']
+        
+        # Clean and parse JSON
+        json_start = content.find('{')
+        json_end = content.rfind('}') + 1
+        json_str = content[json_start:json_end]
+        
+        try:
+            parsed = json.loads(json_str)
+        except json.JSONDecodeError:
+            raise HTTPException(502, "Invalid JSON response from AI")
+        return parsed if isinstance(parsed, dict) else {}
+
+# =============================================================================
+# LOCAL TEXT PARSE (NO NETWORK, USED AS THE HEDGE IN "hedged" MODE)
+# =============================================================================
+
+class LocalTextExtractor:
+    async def extract_sof_data(self, upload: PdfUpload) -> Dict:
+        """Parse the PDF text layer locally with PyPDF2 and the regex parsers"""
+        text = await pdf_extractor.text(upload.source)
+        return {
+            "vessel_info": extract_vessel_info_text(text),
+            "events": extract_events_text(text)
+        }
 
 # =============================================================================
 # MAIN EXTRACTION ENDPOINT WITH FALLBACK CHAIN
 # =============================================================================
 
-@app.post("/extract")
-async def extract_sof(pdf: UploadFile):
-    """Extract SOF data using multiple APIs with fallback"""
-    if not pdf.filename.lower().endswith('.pdf'):
-        raise HTTPException(400, "Only PDF files are supported")
+@app.post("/extract", openapi_extra=form_schema("pdf"))
+async def extract_sof(request: Request, mode: Optional[str] = None):
+    """Extract SOF data using multiple APIs with fallback (PDF in form field "pdf", read as it streams in)"""
+    if mode not in (None, "sequential", "hedged"):
+        raise HTTPException(400, "mode must be 'sequential' or 'hedged'")
     
-    pdf_bytes = await pdf.read()
+    with stage("upload_read"):
+        _, upload = await receive_pdf(request, "pdf", MAX_UPLOAD_BYTES, SPOOL_MEMORY_BYTES)
+    try:
+        return await _run_extractors(upload, mode or EXTRACT_MODE)
+    finally:
+        upload.close()
+
+async def _call_extractor(name: str, extractor, upload: PdfUpload) -> Dict:
+    """Run one extractor and tag the result with its name"""
+    outcome = "error"
+    try:
+        with stage("provider_call", name):
+            result = await extractor.extract_sof_data(upload)
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        metrics.PROVIDER_CALLS.inc(provider=name, outcome=outcome)
     
-    # Try APIs in order of preference
-    extractors = []
+    result["api_used"] = name
+    return result
+
+def _build_extractors() -> Dict:
+    """Configured extractors, in order of preference (built once at startup)"""
+    extractors = {}
     
-    # Add available extractors
     if config.azure_endpoint and config.azure_key:
-        extractors.append(("Azure Document Intelligence", AzureDocumentIntelligence()))
+        extractors["Azure Document Intelligence"] = AzureDocumentIntelligence()
     
     if config.hf_token:
-        extractors.append(("Hugging Face", HuggingFaceExtractor()))
+        extractors["Hugging Face"] = HuggingFaceExtractor()
     
     if config.openai_key or config.openrouter_key:
-        extractors.append(("OpenAI/OpenRouter", OpenAIExtractor()))
+        extractors["OpenAI/OpenRouter"] = OpenAIExtractor()
     
-    if not extractors:
+    return extractors
+
+EXTRACTORS = _build_extractors()
+LOCAL_EXTRACTOR = LocalTextExtractor()
+
+# Per-provider circuit breakers and health scores (reported on /health)
+provider_router = ProviderRouter()
+
+async def _run_extractors(upload: PdfUpload, mode: str) -> Dict:
+    """Run the configured extractors as a fallback chain, or race them in hedged mode"""
+    if not EXTRACTORS:
         raise HTTPException(500, "No API keys configured")
     
+    # Healthiest providers first; open circuits are skipped without a call
+    order = provider_router.order(list(EXTRACTORS))
+    
+    if mode == "hedged":
+        # Race every provider against the local parse; best acceptable result wins
+        candidates = [(name, lambda name=name: provider_router.call(name, lambda: _call_extractor(name, EXTRACTORS[name], upload)))
+                      for name in order]
+        candidates.append(("Local text parse", lambda: _call_extractor("Local text parse", LOCAL_EXTRACTOR, upload)))
+        return await hedged(candidates, HEDGE_BUDGET_S)
+    
     # Try each extractor
-    for name, extractor in extractors:
+    for name in order:
         try:
-            print(f"Trying {name}...")
-            
-            if name == "OpenAI/OpenRouter":
-                # For OpenAI, we need to convert PDF to text first
-                # This is a simplified approach - you'd want proper PDF parsing
-                text = str(pdf_bytes)[:4000]  # Simple text extraction
-                result = await extractor.extract_sof_data(text)
-            else:
-                result = await extractor.extract_sof_data(pdf_bytes)
-            
-            result["api_used"] = name
-            return result
+            logger.info("Trying %s...", name)
+            return await provider_router.call(name, lambda: _call_extractor(name, EXTRACTORS[name], upload))
             
         except Exception as e:
-            print(f"{name} failed: {str(e)}")
+            logger.warning("%s failed: %s", name, getattr(e, "detail", e))
             continue
     
     raise HTTPException(500, "All extraction methods failed")
@@ -527,9 +662,16 @@ async def health_check():
     return {
         "status": "healthy",
         "available_apis": available_apis,
+        "providers": provider_router.snapshot(),
+        "llm_cache": EXTRACTORS["OpenAI/OpenRouter"].cache.stats() if "OpenAI/OpenRouter" in EXTRACTORS else None,
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics (stage latency histograms, provider call counters)"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
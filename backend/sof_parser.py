@@ -0,0 +1,158 @@
+"""Local SOF text parsing: vessel info and events.
+
+Used for PyPDF2 text and for post-processing Azure's flattened content. The
+parsers scan the text once per call: vessel fields are located with plain
+substring search before their regex runs, and each line is classified as a
+date header, time range, HRS bullet or generic row using cheap character
+gates so that most lines never reach a regex.
+"""
+
+import re
+from typing import Dict, List
+
+from normalize import calc_duration, norm_date, norm_time
+from sof_events import Event, sort_key
+
+# ---- Vessel info ----
+VESSEL_PATTERNS = {
+    "Vessel Name": [r"(?i)(?:Name of Vessel|Vessel|M\.V\.|Ship)\s*[:\-]?\s*([^\n\r]+)"],
+    "Master": [r"(?i)(?:Name of Master|Master|Captain)\s*[:\-]?\s*([^\n\r]+)"],
+    "Agent": [r"(?i)(?:Name of Agent|Agent)\s*[:\-]?\s*([^\n\r]+)"],
+    "Port of Loading": [r"(?i)(?:Port of Loading|Loading Port|From)\s*[:\-]?\s*([^\n\r,]+)"],
+    "Port of Discharge": [r"(?i)(?:Port of Discharging|Port of Discharge|Discharge Port|To)\s*[:\-]?\s*([^\n\r,]+)"],
+    "Cargo": [r"(?i)(?:Cargo Description|Description of Cargo|Cargo|Commodity)\s*[:\-]?\s*([^\n\r]+?)\s*(?:Quantity|$)"],
+    "Quantity (MT)": [r"(?i)(?:Quantity|Cargo Quantity)\s*[:\-]?\s*([\d,\.]+)", r"([\d,\.]+)\s*(?:METRIC TONS|MT|Tons)"],
+}
+
+# Lower-case keywords each VESSEL_PATTERNS entry must start with (None = no fixed prefix)
+VESSEL_ANCHORS = {
+    "Vessel Name": [("name of vessel", "vessel", "m.v.", "ship")],
+    "Master": [("name of master", "master", "captain")],
+    "Agent": [("name of agent", "agent")],
+    "Port of Loading": [("port of loading", "loading port", "from")],
+    "Port of Discharge": [("port of discharging", "port of discharge", "discharge port", "to")],
+    "Cargo": [("cargo description", "description of cargo", "cargo", "commodity")],
+    "Quantity (MT)": [("quantity", "cargo quantity"), None],
+}
+
+_VESSEL_RULES = [
+    (field, [(re.compile(p), anchors) for p, anchors in zip(pats, VESSEL_ANCHORS[field])])
+    for field, pats in VESSEL_PATTERNS.items()
+]
+_AT_TO_PREFIX = re.compile(r"^(AT|TO)\s+", re.IGNORECASE)
+
+
+def _folded(text: str):
+    """Lower-cased text whose offsets line up with `text`, or None if they wouldn't.
+
+    re's IGNORECASE also matches a few non-ASCII letters (dotless i, long s)
+    that str.lower() leaves alone; fall back to a full search when present.
+    """
+    low = text.lower()
+    if len(low) != len(text) or "\u0131" in low or "\u017f" in low:
+        return None
+    return low
+
+
+def extract_vessel_info_text(text: str) -> Dict:
+    out = {}
+    low = _folded(text)
+    for field, rules in _VESSEL_RULES:
+        val = "-"
+        for pat, anchors in rules:
+            start = 0
+            if anchors and low is not None:
+                # A match can only begin at one of its keywords, so start the
+                # regex at the first keyword (or skip it if none occur)
+                hits = [i for i in (low.find(a) for a in anchors) if i >= 0]
+                if not hits:
+                    continue
+                start = min(hits)
+            m = pat.search(text, start)
+            if m:
+                val = _AT_TO_PREFIX.sub("", m.group(1).strip())
+                break
+        out[field] = val
+    return out
+
+# ---- Events ----
+_DATE_HEADER = re.compile(r'(ON\s+[A-Z]+\s+\d{1,2},\s*\d{4}|\d{1,2}\.\d{1,2}\.\d{4}|[A-Z][a-z]{2,8}\.?\s*\d{1,2},\s*\d{4})', re.IGNORECASE)
+_TIME_RANGE = re.compile(r'(\d{4})-(\d{4})')
+_HRS_BULLET = re.compile(r'[•\-\*]?\s*(\d{3,4})\s*HRS?[:\-]?\s*(.+)', re.IGNORECASE)
+_HAS_DIGIT = re.compile(r'\d')
+_TIME_TOKEN = re.compile(r'\d{3,4}')
+_SINGLE_TIME = re.compile(r'(\d{3,4})(?!-)')
+
+def sort_events(events: List[Event]) -> List[Event]:
+    """Sort events chronologically in place; placeholder row if there are none."""
+    events.sort(key=sort_key)
+    return events or [Event()]
+
+
+class EventParser:
+    """Incremental event parser; the current date header carries across feed() calls.
+
+    Text must be fed in whole lines (e.g. one PDF page at a time).
+    """
+
+    def __init__(self):
+        self.current_date = ""
+        self.events: List[Event] = []
+
+    def feed(self, text: str) -> List[Event]:
+        """Parse more text and return the events it contained, in document order."""
+        events = []
+        current_date = self.current_date
+        for line in text.split("\n"):
+            line = line.strip()
+            # every row kind needs at least one digit
+            if not line or not _HAS_DIGIT.search(line):
+                continue
+            # date header: short line, all date forms contain ',' or '.'
+            if len(line) <= 60 and ("," in line or "." in line):
+                dm = _DATE_HEADER.search(line)
+                if dm:
+                    current_date = norm_date(dm.group(1))
+                    continue
+            # time range like "0800-1200"
+            tr = _TIME_RANGE.search(line) if "-" in line else None
+            if tr:
+                s = norm_time(tr.group(1)); e = norm_time(tr.group(2)); dur = calc_duration(s, e)
+                desc = line.split(tr.group(0), 1)[-1].strip() or "Loading Operations"
+                rem = "-"
+                low = line.lower()
+                if "rain" in low: rem="Weather delay"
+                elif "breakdown" in low: rem="Equipment failure"
+                elif "survey" in low: rem="Survey"
+                events.append(Event(current_date or "-", s, e, dur, desc.title(), rem))
+                continue
+            # bullet with single time like "• 1600 HRS: ARRIVED"
+            low = line.lower()
+            bt = _HRS_BULLET.search(line) if "hr" in low else None
+            if bt:
+                s = norm_time(bt.group(1)); desc = bt.group(2).strip()
+                rem = "-"
+                if "arriv" in low: rem="Arrival"
+                elif "sailed" in low or "depart" in low: rem="Departure"
+                events.append(Event(current_date or "-", s, "-", "-", desc.title(), rem))
+                continue
+            # generic row with date + times
+            if current_date and len(line) > 15 and _TIME_TOKEN.search(line):
+                single = _SINGLE_TIME.search(line)
+                if single:
+                    s = norm_time(single.group(1))
+                    desc = line.split(single.group(1), 1)[-1].strip()
+                    events.append(Event(current_date or "-", s, "-", "-", desc.title() or "-", "-"))
+        self.current_date = current_date
+        self.events.extend(events)
+        return events
+
+    def finish(self) -> List[Event]:
+        """All events seen so far, sorted."""
+        return sort_events(list(self.events))
+
+
+def extract_events_text(text: str) -> List[Event]:
+    parser = EventParser()
+    parser.feed(text)
+    return parser.finish()
@@ -0,0 +1,135 @@
+"""Events from Azure layout tables.
+
+Azure's prebuilt-layout returns each table as a flat cell list. The table
+is laid out column by column, and each column's role (date, from, to, time range,
+duration, description, remarks) is decided once from the header row text.
+A "Day" column only stands in for the date when no column is headed "Date"
+and its cells hold dates, so a weekday column is never read as the date.
+Rows are then mapped straight into events by column, so no regex runs over
+whole rows. Continuation tables that repeat no header reuse the roles of
+the previous table with the same column count.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from normalize import MISSING, day_ordinal, duration_column, norm_date, time_column, time_range_column
+from sof_events import Event
+from sof_parser import sort_events
+
+# Header keywords per column role, checked in this order
+ROLE_KEYWORDS = (
+    ("remarks", {"remark", "remarks", "comment", "comments", "note", "notes"}),
+    ("duration", {"duration", "elapsed", "total"}),
+    ("start", {"from", "start", "started", "commenced", "commence", "begin"}),
+    ("end", {"to", "end", "ended", "completed", "until", "finish", "finished"}),
+    ("date", {"date"}),
+    ("time", {"time", "times", "hrs", "hours", "hour"}),
+    ("description", {"description", "event", "events", "activity", "activities", "operation", "operations", "particulars", "details"}),
+)
+
+# "Day" is often a weekday column next to the date; it is only the date column as a fallback
+DAY_KEYWORDS = {"day", "days"}
+
+_WORDS = re.compile(r"[a-z]+")
+
+
+def _columns(table: Dict):
+    """Cell text as a list of columns, plus the indices of header rows."""
+    n_rows = table.get("rowCount") or 1 + max((c.get("rowIndex", 0) for c in table.get("cells", [])), default=-1)
+    n_cols = table.get("columnCount") or 1 + max((c.get("columnIndex", 0) for c in table.get("cells", [])), default=-1)
+    columns = [[""] * n_rows for _ in range(n_cols)]
+    header_rows = set()
+    for cell in table.get("cells", []):
+        r, c = cell.get("rowIndex", 0), cell.get("columnIndex", 0)
+        if r < n_rows and c < n_cols:
+            columns[c][r] = (cell.get("content") or "").strip()
+            if cell.get("kind") == "columnHeader":
+                header_rows.add(r)
+    return columns, sorted(header_rows)
+
+
+def _holds_dates(column: List[str], header_rows: List[int]) -> bool:
+    skip = set(header_rows)
+    return any(day_ordinal(norm_date(v)) != MISSING for r, v in enumerate(column) if v and r not in skip)
+
+
+def _roles(columns: List[List[str]], header_rows: List[int]) -> Dict[str, int]:
+    roles: Dict[str, int] = {}
+    headers = [set(_WORDS.findall(" ".join(column[r] for r in header_rows).lower())) for column in columns]
+    for c, words in enumerate(headers):
+        for role, keywords in ROLE_KEYWORDS:
+            if role not in roles and words & keywords:
+                roles[role] = c
+                break
+    if "date" not in roles:
+        taken = set(roles.values())
+        for c, words in enumerate(headers):
+            if c not in taken and words & DAY_KEYWORDS and _holds_dates(columns[c], header_rows):
+                roles["date"] = c
+                break
+    if "description" not in roles:
+        # the widest unlabelled column is the description
+        free = [c for c in range(len(columns)) if c not in roles.values()]
+        if free:
+            roles["description"] = max(free, key=lambda c: sum(len(v) for v in columns[c]))
+    return roles
+
+
+def _remark(text: str) -> str:
+    low = text.lower()
+    if "rain" in low: return "Weather delay"
+    if "breakdown" in low: return "Equipment failure"
+    if "survey" in low: return "Survey"
+    return "-"
+
+
+def _table_events(columns: List[List[str]], roles: Dict[str, int], skip_rows: List[int], current_date: str):
+    """Events of one table, and the date in effect after its last row."""
+    if not ({"start", "time"} & roles.keys()):
+        return [], current_date
+    n_rows = len(columns[0])
+    get = lambda role: columns[roles[role]] if role in roles else [""] * n_rows
+    dates, starts, ends, times = get("date"), get("start"), get("end"), get("time")
+    durations, descs, remarks = get("duration"), get("description"), get("remarks")
+    # normalize whole columns first; each distinct value is parsed once
+    start_col, end_col = time_column(starts), time_column(ends)
+    if "time" in roles:
+        # a single "time" column holds ranges; it fills rows without from/to times
+        range_starts, range_ends = time_range_column(times)
+        for r in range(n_rows):
+            if start_col[r] == "-" and end_col[r] == "-":
+                start_col[r], end_col[r] = range_starts[r], range_ends[r]
+    calc = duration_column(start_col, end_col)
+    skip = set(skip_rows)
+    events = []
+    for r in range(n_rows):
+        if r in skip:
+            continue
+        if dates[r]:
+            current_date = norm_date(dates[r])
+        s, e, desc = start_col[r], end_col[r], descs[r]
+        if s == "-" and not desc:
+            continue
+        duration = calc[r] if calc[r] != "-" else durations[r] or "-"
+        events.append(Event(current_date or "-", s, e, duration, desc.title() or "-", remarks[r] or _remark(desc)))
+    return events, current_date
+
+
+def extract_events_tables(tables: List[Dict]) -> Optional[List[Event]]:
+    """Sorted events from Azure layout tables, or None if no table holds events."""
+    events = []
+    current_date = ""  # dates carry over into continuation tables
+    last_roles: Dict[int, Dict[str, int]] = {}  # column count -> roles of the last event table
+    for table in tables:
+        columns, header_rows = _columns(table)
+        if not columns or not columns[0]:
+            continue
+        if not header_rows and not any(ch.isdigit() for ch in " ".join(col[0] for col in columns)):
+            header_rows = [0]  # unlabelled header row
+        roles = _roles(columns, header_rows) if header_rows else last_roles.get(len(columns), {})
+        table_events, current_date = _table_events(columns, roles, header_rows, current_date)
+        if table_events:
+            last_roles[len(columns)] = roles
+            events.extend(table_events)
+    return sort_events(events) if events else None
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Import-time and startup-time report for the API
+Usage: python startup_report.py [--top 15] [--runs 3] [--port 8090] [--output startup.json]
+
+First runs `python -X importtime -c "import main"` and lists the modules
+with the largest cumulative import time. Then starts uvicorn from scratch
+`--runs` times and measures, from process spawn: when the port answers
+(/health), when the first /extract of a bundled sample returns, and when
+warm-up has finished (/ready returns 200). The app's own /ready phase
+breakdown of the last run is printed as well.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SAMPLES_DIR = HERE.parent / "SOF Samples"
+
+
+def import_times(top: int):
+    """(total seconds, [(module, cumulative seconds)]) for importing main."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=HERE,
+                          capture_output=True, text=True, env=os.environ.copy())
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ import main failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative) / 1e6))
+    total = next((sec for name, sec in reversed(rows) if name == "main"), 0.0)
+    # top-level view: skip submodules of a package that is already listed
+    rows.sort(key=lambda r: -r[1])
+    shown = []
+    for name, sec in rows:
+        if name != "main" and not any(name.startswith(parent + ".") for parent, _ in shown):
+            shown.append((name, sec))
+        if len(shown) == top:
+            break
+    return total, shown
+
+
+def request(url: str, data: bytes = None, headers: dict = None) -> int:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers or {}), timeout=60) as r:
+            r.read()
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def multipart(pdf: bytes) -> tuple:
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="pdf"; filename="sample.pdf"\r\n'
+            "Content-Type: application/pdf\r\n\r\n").encode() + pdf + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def cold_start(port: int, pdf: bytes, scratch: Path) -> dict:
+    env = dict(os.environ, SOF_JOBS_DB=str(scratch / "jobs.db"), SOF_STORE_DB=str(scratch / "extractions.db"))
+    base = f"http://127.0.0.1:{port}"
+    # unique trailing bytes so the first extraction is never a cache hit
+    body, headers = multipart(pdf + f"\n% startup {uuid.uuid4().hex}\n".encode())
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)], cwd=HERE, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                request(f"{base}/health")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise SystemExit("❌ uvicorn exited during startup")
+                time.sleep(0.01)
+        listening = time.perf_counter() - start
+        status = request(f"{base}/extract", body, headers)
+        first_extract = time.perf_counter() - start
+        while request(f"{base}/ready") != 200:
+            time.sleep(0.05)
+        ready = time.perf_counter() - start
+        with urllib.request.urlopen(f"{base}/ready") as r:
+            report = json.load(r)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"listening_s": round(listening, 3), "first_extract_s": round(first_extract, 3),
+            "first_extract_status": status, "ready_s": round(ready, 3), "app_report": report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and cold-start report")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative import time")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts to measure")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    total, modules = import_times(args.top)
+    print(f"📦 import main: {total * 1000:.0f} ms")
+    for name, sec in modules:
+        print(f"   {sec * 1000:8.1f} ms  {name}")
+
+    samples = sorted(SAMPLES_DIR.glob("*.pdf"))
+    if not samples:
+        print("❌ No sample PDFs for the cold-start runs")
+        return 1
+    pdf = samples[0].read_bytes()
+    runs = []
+    print(f"\n🚀 {args.runs} cold start(s), times from process spawn")
+    print(f"{'run':>4} {'listening':>10} {'1st extract':>12} {'ready':>8}")
+    for i in range(args.runs):
+        with tempfile.TemporaryDirectory() as scratch:
+            run = cold_start(args.port, pdf, Path(scratch))
+        runs.append(run)
+        print(f"{i + 1:>4} {run['listening_s']:>9}s {run['first_extract_s']:>11}s {run['ready_s']:>7}s"
+              + ("" if run["first_extract_status"] == 200 else f"  (extract status {run['first_extract_status']})"))
+    median = {k: statistics.median(r[k] for r in runs) for k in ("listening_s", "first_extract_s", "ready_s")}
+    print(f"{'med':>4} {median['listening_s']:>9}s {median['first_extract_s']:>11}s {median['ready_s']:>7}s")
+    print("\n🔎 /ready (last run): " + json.dumps(runs[-1]["app_report"]))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "import_main_s": round(total, 4),
+            "top_imports_s": {name: round(sec, 4) for name, sec in modules},
+            "cold_starts": runs,
+            "median": median,
+        }, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
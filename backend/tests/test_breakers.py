@@ -0,0 +1,84 @@
+import asyncio, io
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from breakers import CLOSED, OPEN, ProviderRouter, ProviderUnavailable, upstream_status
+
+SAMPLE = Path(__file__).resolve().parents[2] / "SOF Samples" / "Samp3.pdf"
+
+
+def router() -> ProviderRouter:
+    r = ProviderRouter()
+    r.failure_threshold = 3
+    return r
+
+
+async def parse_pdf(data: bytes) -> int:
+    from PyPDF2 import PdfReader
+    return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def test_bad_pdfs_do_not_open_the_breaker():
+    pytest.importorskip("PyPDF2")
+    r = router()
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(Exception):
+                await r.call("local", lambda: parse_pdf(b"%PDF-1.4\nnot really a pdf"))
+            with pytest.raises(HTTPException):
+                await r.call("azure", lambda: _raise(HTTPException(upstream_status(400), "Azure analyze error: 400")))
+        return await r.call("local", lambda: parse_pdf(SAMPLE.read_bytes()))
+
+    assert asyncio.run(run()) >= 1
+    snapshot = r.snapshot()
+    assert snapshot["local"]["state"] == CLOSED
+    assert snapshot["local"]["consecutive_failures"] == 0
+    assert snapshot["local"]["success_rate"] == 1.0
+    assert snapshot["azure"]["consecutive_failures"] == 0
+    assert r.order(["azure", "local"]) == ["azure", "local"]
+
+
+@pytest.mark.parametrize("exc", [
+    HTTPException(upstream_status(503), "Azure analyze error: 503"),
+    HTTPException(upstream_status(429), "Azure analyze error: 429"),
+    asyncio.TimeoutError(),
+    ConnectionResetError(),
+])
+def test_upstream_failures_open_the_breaker(exc):
+    r = router()
+
+    async def run():
+        for _ in range(r.failure_threshold):
+            with pytest.raises(type(exc)):
+                await r.call("azure", lambda: _raise(exc))
+        with pytest.raises(ProviderUnavailable):
+            await r.call("azure", lambda: _raise(exc))
+
+    asyncio.run(run())
+    assert r.snapshot()["azure"]["state"] == OPEN
+    assert r.order(["azure"]) == []
+
+
+def test_input_error_releases_the_half_open_probe():
+    r = router()
+    breaker = r._get("azure")[0]
+    breaker.state, breaker.opened_at = OPEN, 0.0  # cool-down long over
+
+    async def run():
+        with pytest.raises(ValueError):
+            await r.call("azure", lambda: _raise(ValueError("corrupt PDF")))
+        return await r.call("azure", _ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == CLOSED
+
+
+async def _raise(exc: BaseException):
+    raise exc
+
+
+async def _ok():
+    return "ok"
@@ -0,0 +1,62 @@
+import asyncio, sqlite3
+
+from jobs import FAILED, SUCCEEDED, JobQueue, JobStore
+from uploads import PdfUpload
+
+PDF = b"%PDF-1.4\n" + b"0" * 100
+
+
+class FlakyStore(JobStore):
+    """A JobStore whose first `failures` calls to `method` raise "database is locked"."""
+
+    def __init__(self, path, method, failures):
+        super().__init__(path)
+        self.method, self.failures = method, failures
+        for name in ("load_pdf", "mark"):
+            setattr(self, name, self._flaky(name, getattr(self, name)))
+
+    def _flaky(self, name, fn):
+        def call(*args, **kwargs):
+            if name == self.method and self.failures > 0:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return fn(*args, **kwargs)
+        return call
+
+
+async def run_jobs(store, n, on_result=None, workers=1):
+    async def runner(upload):
+        return {"vessel_info": {}, "events": [], "size": upload.size}
+
+    queue = JobQueue(store, runner, workers=workers, on_result=on_result)
+    await queue.start()
+    try:
+        ids = [await queue.submit(f"sof{i}.pdf", PdfUpload.from_bytes(PDF)) for i in range(n)]
+        await asyncio.wait_for(queue._queue.join(), 5)
+        assert all(not t.done() for t in queue._tasks)  # no worker died
+        return [await queue.get(job_id) for job_id in ids]
+    finally:
+        await queue.stop()
+
+
+def test_worker_survives_store_errors(tmp_path):
+    store = FlakyStore(str(tmp_path / "jobs.db"), "load_pdf", failures=2)
+    jobs = asyncio.run(run_jobs(store, 4))
+    assert [job["status"] for job in jobs] == [FAILED, FAILED, SUCCEEDED, SUCCEEDED]
+    assert "database is locked" in jobs[0]["error"]
+
+
+def test_worker_survives_failing_result_hook(tmp_path):
+    async def on_result(digest, filename, result):
+        raise RuntimeError("history unavailable")
+
+    jobs = asyncio.run(run_jobs(JobStore(str(tmp_path / "jobs.db")), 3, on_result))
+    assert [job["status"] for job in jobs] == [SUCCEEDED] * 3
+    assert jobs[0]["result"]["size"] == len(PDF)
+
+
+def test_job_left_unfinished_when_it_cannot_be_marked(tmp_path):
+    # every mark fails for the first job: it stays queued for the next restart, the worker carries on
+    store = FlakyStore(str(tmp_path / "jobs.db"), "mark", failures=2)
+    jobs = asyncio.run(run_jobs(store, 2))
+    assert [job["status"] for job in jobs] == ["queued", SUCCEEDED]
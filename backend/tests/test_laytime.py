@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from laytime import Voyage, compute_batch
+
+
+def event(start, end, description="Loading", remarks="-", date="10 Jun 2024"):
+    return {"Date": date, "Start Time": start, "End Time": end, "Duration": "-",
+            "Event Description": description, "Remarks": remarks}
+
+
+def test_time_used_runs_from_commencement_to_completion():
+    events = [
+        event("08:00", "10:00"),
+        event("14:00", "16:00", "Rain Stopped Loading", "Weather delay"),
+        event("18:00", "20:00"),
+    ]
+    [row] = compute_batch([Voyage(id="v1", events=events, allowed_hours=8, demurrage_rate=24000)])
+    assert row["commenced"] == "2024-06-10T08:00"
+    assert row["completed"] == "2024-06-10T20:00"
+    assert row["time_used_hours"] == 12  # the gaps between events count
+    assert row["time_excepted_hours"] == 2
+    assert row["time_counted_hours"] == 10
+    assert (row["balance_hours"], row["result"], row["amount"]) == (2, "demurrage", 2000)
+
+
+def test_overlapping_and_overnight_events():
+    events = [
+        event("22:00", "02:00"),  # runs past midnight
+        event("23:00", "01:00", "Breakdown Of Crane", "Equipment failure"),
+        event("01:30", "03:00", "Breakdown Of Crane", "Equipment failure", date="11 Jun 2024"),
+        event("06:00", "08:00", date="11 Jun 2024"),
+    ]
+    [row] = compute_batch([Voyage(events=events, allowed_hours=12, demurrage_rate=1000)])
+    assert row["time_used_hours"] == 10
+    assert row["time_excepted_hours"] == 3.5
+    assert row["time_counted_hours"] == 6.5
+    assert (row["balance_hours"], row["result"]) == (-5.5, "dispatch")
+    assert row["amount"] == pytest.approx(5.5 / 24 * 500, abs=0.01)
+
+
+def test_voyage_without_timed_events_has_no_result():
+    untimed = [event("09:00", "-"), {"Date": "-", "Start Time": "-", "End Time": "-", "Duration": "-",
+                                      "Event Description": "-", "Remarks": "-"}]
+    rows = compute_batch([
+        Voyage(id="empty", events=[], quantity=1000, rate=500, demurrage_rate=10000),
+        Voyage(id="untimed", events=untimed, allowed_hours=24, demurrage_rate=10000),
+        Voyage(id="timed", events=[event("08:00", "20:00")], allowed_hours=24, demurrage_rate=10000),
+    ])
+    for row in rows[:2]:
+        assert row["time_used_hours"] == 0
+        assert row["commenced"] is None and row["completed"] is None
+        assert (row["balance_hours"], row["result"], row["amount"]) == (None, None, None)
+    assert rows[0]["laytime_allowed_hours"] == 48
+    assert rows[2]["result"] == "dispatch"
+
+
+def test_voyage_without_allowed_laytime_has_no_result():
+    [row] = compute_batch([Voyage(events=[event("08:00", "20:00")])])
+    assert row["time_counted_hours"] == 12
+    assert row["laytime_allowed_hours"] is None
+    assert (row["balance_hours"], row["result"], row["amount"]) == (None, None, None)
@@ -0,0 +1,70 @@
+from sof_tables import extract_events_tables
+
+
+def table(rows, header=True):
+    cells = [
+        {"rowIndex": r, "columnIndex": c, "content": text, **({"kind": "columnHeader"} if header and r == 0 else {})}
+        for r, row in enumerate(rows) for c, text in enumerate(row)
+    ]
+    return {"rowCount": len(rows), "columnCount": len(rows[0]), "cells": cells}
+
+
+def rows_of(events):
+    return [(ev["Date"], ev["Start Time"], ev["End Time"], ev["Duration"], ev["Event Description"]) for ev in events]
+
+
+def test_weekday_column_before_date_column():
+    events = extract_events_tables([table([
+        ["Day", "Date", "From", "To", "Description"],
+        ["Monday", "10.06.2024", "0800", "1000", "NOR tendered"],
+        ["", "", "1030", "1200", "Commenced loading"],
+        ["Tuesday", "11/06/2024", "0600", "0730", "Completed loading"],
+    ])])
+    assert rows_of(events) == [
+        ("10 Jun 2024", "08:00", "10:00", "2h", "Nor Tendered"),
+        ("10 Jun 2024", "10:30", "12:00", "1.5h", "Commenced Loading"),
+        ("11 Jun 2024", "06:00", "07:30", "1.5h", "Completed Loading"),
+    ]
+
+
+def test_day_column_holding_dates_is_the_date_column():
+    events = extract_events_tables([table([
+        ["Day", "Time", "Remarks", "Event"],
+        ["10.06.2024", "0800-1000", "", "Rain stopped loading"],
+    ])])
+    assert rows_of(events) == [("10 Jun 2024", "08:00", "10:00", "2h", "Rain Stopped Loading")]
+    assert events[0]["Remarks"] == "Weather delay"
+
+
+def test_weekday_column_without_date_column_gives_no_date():
+    events = extract_events_tables([table([
+        ["Day", "From", "To", "Description"],
+        ["Monday", "0800", "1000", "NOR tendered"],
+    ])])
+    assert rows_of(events) == [("-", "08:00", "10:00", "2h", "Nor Tendered")]
+
+
+def test_continuation_table_reuses_roles():
+    header = table([
+        ["Day", "Date", "From", "To", "Description"],
+        ["Monday", "10.06.2024", "0800", "1000", "NOR tendered"],
+    ])
+    continuation = table([["Monday", "", "2200", "0100", "Shifting"]], header=False)
+    events = extract_events_tables([header, continuation])
+    assert rows_of(events)[-1] == ("10 Jun 2024", "22:00", "01:00", "3h", "Shifting")
+
+
+def test_time_cells_in_any_format():
+    events = extract_events_tables([table([
+        ["Date", "Time", "From", "To", "Description"],
+        ["10.06.2024", "08:00 to 10:00", "", "", "Pilot on board"],
+        ["", "", "1030 hrs", "12:15", "All fast"],
+        ["", "1300", "", "", "Gangway down"],
+        ["", "13:30–14:00", "", "", "Free pratique"],
+    ])])
+    assert rows_of(events) == [
+        ("10 Jun 2024", "08:00", "10:00", "2h", "Pilot On Board"),
+        ("10 Jun 2024", "10:30", "12:15", "1.8h", "All Fast"),
+        ("10 Jun 2024", "13:00", "-", "-", "Gangway Down"),
+        ("10 Jun 2024", "13:30", "14:00", "0.5h", "Free Pratique"),
+    ]
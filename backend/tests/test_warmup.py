@@ -0,0 +1,42 @@
+import asyncio
+
+from warmup import Startup
+
+
+def test_warmup_runs_under_constant_traffic():
+    async def run():
+        startup = Startup()
+        done = []
+
+        async def step():
+            done.append(startup.active)
+
+        with startup.request():  # a request that never finishes
+            startup.start({"step": step}, max_wait=0.2)
+            await asyncio.wait_for(startup._task, 2)
+        return startup, done
+
+    startup, done = asyncio.run(run())
+    assert startup.ready and done == [1]
+
+
+def test_warmup_waits_for_a_gap():
+    async def run():
+        startup = Startup()
+        order = []
+
+        async def step():
+            order.append("warm")
+
+        async def request():
+            with startup.request():
+                await asyncio.sleep(0.2)
+            order.append("request done")
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        startup.start({"step": step}, max_wait=5)
+        await asyncio.gather(task, startup._task)
+        return order
+
+    assert asyncio.run(run()) == ["request done", "warm"]
@@ -0,0 +1,223 @@
+"""Size-bounded, spooled uploads read straight off the request body.
+
+Upload routes take the raw request and parse the multipart body as it
+streams in (with python-multipart, as Starlette does), so each file is
+hashed and written to exactly one spool: memory for small files, a named
+temp file beyond `spool_bytes`. A Content-Length over the limit is refused
+before any of the body is read, and a streamed body is cut off as soon as
+it passes the limit or a PDF fails the %PDF- magic check. Azure, PyPDF2 and
+the process pool all read from that one spool: each gets its own handle or
+the file path, not a copy.
+"""
+
+import hashlib, io, os, tempfile
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+PDF_MAGIC = b"%PDF-"
+HEAD_BYTES = 1024  # the spec allows a little junk before the header
+CHUNK_SIZE = 1024 * 1024
+FORM_OVERHEAD = 64 * 1024  # boundaries, part headers and small form fields
+
+
+def _too_large(max_bytes: int, what: str = "PDF") -> HTTPException:
+    return HTTPException(413, f"{what} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+
+class PdfUpload:
+    def __init__(self, data: Optional[bytes] = None, path: Optional[str] = None, size: int = 0, digest: str = ""):
+        self._data = data
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PdfUpload":
+        return cls(data=data, size=len(data), digest=hashlib.sha256(data).hexdigest())
+
+    @classmethod
+    def from_chunks(cls, chunks, max_bytes: int, spool_bytes: int = CHUNK_SIZE) -> "PdfUpload":
+        """Spool an iterable of byte chunks (e.g. a stored job's PDF), enforcing the limits."""
+        spool = Spool(max_bytes, spool_bytes)
+        try:
+            for chunk in chunks:
+                spool.write(chunk)
+            return spool.finish()
+        except BaseException:
+            spool.discard()
+            raise
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The in-memory bytes, or the temp file path for spooled uploads."""
+        return self._data if self._data is not None else self.path
+
+    def open(self) -> BinaryIO:
+        """A fresh, independent reader over the upload."""
+        if self._data is not None:
+            return io.BytesIO(self._data)  # shares the bytes buffer, no copy
+        return open(self.path, "rb")
+
+    def head(self, n: int = HEAD_BYTES) -> bytes:
+        with self.open() as f:
+            return f.read(n)
+
+    def close(self) -> None:
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class Spool:
+    """One file as it arrives: hashed and size-checked, in memory up to `spool_bytes`, then a temp file."""
+
+    def __init__(self, max_bytes: int, spool_bytes: int = CHUNK_SIZE, pdf: bool = True):
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.pdf = pdf  # check the %PDF- magic as soon as the head is in
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._head = b""
+        self._buf = bytearray()
+        self._spill = None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise _too_large(self.max_bytes, "PDF" if self.pdf else "File")
+        if len(self._head) < HEAD_BYTES:
+            self._head += chunk[:HEAD_BYTES - len(self._head)]
+            if len(self._head) == HEAD_BYTES:
+                self._check()
+        self._sha.update(chunk)
+        if self._spill is None and len(self._buf) + len(chunk) > self.spool_bytes:
+            self._spill = tempfile.NamedTemporaryFile(prefix="sof-", suffix=".pdf", delete=False)
+            self._spill.write(self._buf)
+            self._buf = bytearray()
+        if self._spill is not None:
+            self._spill.write(chunk)
+        else:
+            self._buf += chunk
+
+    def _check(self) -> None:
+        if self.pdf and PDF_MAGIC not in self._head:
+            raise HTTPException(400, "File is not a valid PDF")
+
+    def finish(self) -> PdfUpload:
+        if self.size == 0:
+            raise HTTPException(400, "Uploaded file is empty")
+        if len(self._head) < HEAD_BYTES:
+            self._check()
+        digest = self._sha.hexdigest()
+        if self._spill is not None:
+            self._spill.close()
+            path, self._spill = self._spill.name, None
+            return PdfUpload(path=path, size=self.size, digest=digest)
+        return PdfUpload(data=bytes(self._buf), size=self.size, digest=digest)
+
+    def discard(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            os.unlink(self._spill.name)
+            self._spill = None
+
+
+async def receive_files(request: Request, field: str, max_file_bytes: int, max_body_bytes: int,
+                        spool_bytes: int = CHUNK_SIZE, pdf_only: bool = True) -> List[Tuple[str, PdfUpload]]:
+    """(filename, upload) for each file in form field `field`, spooled as the body streams in.
+
+    Other form fields are skipped. With `pdf_only`, a non-.pdf filename or a
+    body without the PDF magic is rejected as soon as it shows up.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(400, "Expected a multipart/form-data upload")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_body_bytes:
+        raise _too_large(max_body_bytes, "Upload")  # before reading any of the body
+
+    files: List[Tuple[str, PdfUpload]] = []
+    part: Dict = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, name=b"", value=b"")
+
+    def on_header_field(data, start, end):
+        part["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["name"].lower()] = part["value"]
+        part["name"], part["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition"))
+        if options.get(b"name", b"").decode("utf-8", "replace") != field or b"filename" not in options:
+            return
+        filename = options[b"filename"].decode("utf-8", "replace")
+        if pdf_only and not filename.lower().endswith(".pdf"):
+            raise HTTPException(400, "Only PDF files are supported")
+        part["filename"] = filename
+        part["spool"] = Spool(max_file_bytes, spool_bytes, pdf=pdf_only)
+
+    def on_part_data(data, start, end):
+        if "spool" in part:
+            part["spool"].write(data[start:end])
+
+    def on_part_end():
+        spool = part.pop("spool", None)
+        if spool is not None:
+            files.append((part["filename"], spool.finish()))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data, "on_part_end": on_part_end,
+    })
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body_bytes:
+                raise _too_large(max_body_bytes, "Upload")
+            parser.write(chunk)
+        parser.finalize()
+    except BaseException:
+        if "spool" in part:
+            part["spool"].discard()
+        for _, upload in files:
+            upload.close()
+        raise
+    return files
+
+
+async def receive_pdf(request: Request, field: str, max_bytes: int, spool_bytes: int = CHUNK_SIZE) -> Tuple[str, PdfUpload]:
+    """(filename, upload) of the single PDF in form field `field`."""
+    files = await receive_files(request, field, max_bytes, max_bytes + FORM_OVERHEAD, spool_bytes)
+    if not files:
+        raise HTTPException(400, f"No PDF uploaded in form field '{field}'")
+    for _, extra in files[1:]:
+        extra.close()
+    return files[0]
+
+
+def form_schema(field: str, many: bool = False) -> Dict:
+    """openapi_extra for routes that read their multipart body themselves."""
+    file = {"type": "string", "format": "binary"}
+    prop = {"type": "array", "items": file} if many else file
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {
+        "schema": {"type": "object", "properties": {field: prop}, "required": [field]}}}}}
@@ -0,0 +1,116 @@
+"""Startup timing and background warm-up.
+
+`startup` is created when main.py starts importing, so its phases measure
+the cold start: interpreter start to first import (Linux only), module
+imports, and app startup. Warm-up steps (lazy imports, parser state, worker
+processes, provider connections) then run in one background task so the
+server accepts requests immediately. Each step waits until no request is in
+flight, so the request that woke the instance isn't slowed down by it, but
+for no longer than `max_wait` seconds: under steady traffic warm-up runs
+anyway rather than never. Callers leave probe and metrics requests out of
+`request()`, so a health checker alone can't hold it back.
+GET /ready reports each step's time and whether warm-up has finished.
+
+Only the standard library is imported here, so it is cheap to import first.
+"""
+
+import asyncio, importlib, logging, os, time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("sof")
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc (None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # the command name may contain spaces; fields after it are fixed
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Startup:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        age = _process_age()
+        self.phases: Dict[str, float] = {}
+        if age is not None:
+            self.phases["interpreter"] = round(age, 4)  # process start -> first app import
+        self.imports: Dict[str, float] = {}
+        self.steps: Dict[str, Dict] = {}
+        self.active = 0  # requests in flight
+        self._task: Optional[asyncio.Task] = None
+
+    def mark(self, phase: str) -> None:
+        """Record seconds since the app started importing."""
+        self.phases[phase] = round(time.perf_counter() - self.t0, 4)
+
+    def timed_import(self, name: str) -> None:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        self.imports.setdefault(name, round(time.perf_counter() - start, 4))
+
+    @contextmanager
+    def request(self):
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    @property
+    def ready(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def start(self, steps: Dict[str, Callable[[], Awaitable]], delay: float = 0.0, max_wait: float = 5.0) -> None:
+        """Run warm-up steps in order in the background (once), after `delay` seconds.
+
+        Each step waits for a moment with no request in flight, at most `max_wait` seconds.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(steps, delay, max_wait))
+
+    async def _idle(self, max_wait: float) -> None:
+        deadline = time.monotonic() + max_wait
+        while self.active and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def _run(self, steps: Dict[str, Callable[[], Awaitable]], delay: float, max_wait: float) -> None:
+        await asyncio.sleep(delay)
+        for name, step in steps.items():
+            await self._idle(max_wait)
+            start = time.perf_counter()
+            try:
+                await step()
+                outcome = {"ok": True}
+            except Exception as e:
+                # a failed step (e.g. provider unreachable) only means that part stays cold
+                outcome = {"ok": False, "error": str(e) or type(e).__name__}
+                logger.warning("Warm-up step %s failed: %s", name, outcome["error"])
+            self.steps[name] = {"seconds": round(time.perf_counter() - start, 4), **outcome}
+        self.mark("warm")
+        logger.info("Warm-up finished in %.2fs", self.phases["warm"] - self.phases.get("startup", 0.0))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self) -> Dict:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "phases_s": self.phases,
+            "imports_s": self.imports,
+            "warmup_s": self.steps,
+        }
+
+
+startup = Startup()
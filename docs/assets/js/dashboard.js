@@ -120,7 +120,8 @@ class DashboardAPI {
             // Backend expects field name 'pdf'
             formData.append('pdf', this.currentFile);
 
-            const response = await fetch(`${this.baseURL}/extract`, {
+            // Stream results so progress shows up before the whole document is parsed
+            const response = await fetch(`${this.baseURL}/extract/stream?format=ndjson`, {
                 method: 'POST',
                 body: formData
             });
@@ -130,7 +131,7 @@ class DashboardAPI {
                 throw new Error(text || 'Extraction failed');
             }
 
-            const result = await response.json();
+            const result = await this.readExtractionStream(response);
             // Persist extraction result for results page
             localStorage.setItem('extractionResult', JSON.stringify(result));
 
@@ -147,6 +148,46 @@ class DashboardAPI {
         }
     }
 
+    // Read NDJSON frames (vessel_info, events, summary) and report progress as they arrive
+    async readExtractionStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let eventCount = 0;
+        let vesselName = '';
+        let summary = null;
+
+        const handleFrame = (frame) => {
+            if (frame.type === 'vessel_info') {
+                vesselName = (frame.vessel_info || {})['Vessel Name'] || '';
+            } else if (frame.type === 'events') {
+                eventCount += (frame.events || []).length;
+            } else if (frame.type === 'summary') {
+                const { type, ...rest } = frame;
+                summary = rest;
+            } else if (frame.type === 'error') {
+                throw new Error(frame.detail || 'Extraction failed');
+            }
+            const vessel = vesselName && vesselName !== '-' ? `${vesselName} • ` : '';
+            this.showLoading(`Extracting… ${vessel}${eventCount} events so far`);
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) handleFrame(JSON.parse(line));
+            }
+        }
+        if (buffer.trim()) handleFrame(JSON.parse(buffer));
+        if (!summary) throw new Error('Extraction stream ended early');
+        return summary;
+    }
+
     // UI helpers
     showLoading(text = 'Processing...') {
         const loadingOverlay = document.getElementById('loadingOverlay');